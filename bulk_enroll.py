@@ -0,0 +1,35 @@
+"""Face ID Recognition System - Bulk enrollment from an image directory or manifest CSV."""
+
+import argparse
+
+from modules import FaceRecognizer, DataManager, BulkEnrollment
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll many users at once.")
+    parser.add_argument(
+        "source",
+        help="Directory of images (file name = user ID) or CSV with user_id,name,image_path columns",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Image decoding processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per embedding batch and transaction")
+    parser.add_argument("--report", help="CSV file to write per-item failures to")
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    data_manager.connect()
+    try:
+        enrollment = BulkEnrollment(FaceRecognizer(), data_manager, args.workers, args.batch_size)
+        summary = enrollment.run(
+            args.source,
+            report_path=args.report,
+            on_progress=lambda s: print(f"enrolled {s['enrolled']}, skipped {s['skipped']}, failed {s['failed']}"),
+        )
+    finally:
+        data_manager.close()
+
+    print(f"Done: {summary['enrolled']} enrolled, {summary['skipped']} already present, {summary['failed']} failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Face ID Recognition System - Threshold calibration on a labelled photo set."""
+
+import argparse
+import json
+import os
+
+import config
+from modules.calibration import METRICS, calibrate_dataset
+
+# Points kept per FAR/FRR curve in the JSON report
+CURVE_POINTS = 200
+
+
+def plot_curves(model_name: str, results: dict, path: str) -> None:
+    """Save FAR/FRR vs threshold curves, one panel per metric."""
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, len(results), figsize=(5 * len(results), 4), squeeze=False)
+    for ax, (metric, result) in zip(axes[0], results.items()):
+        rates = result['rates']
+        ax.plot(rates['thresholds'], rates['far'], label="FAR")
+        ax.plot(rates['thresholds'], rates['frr'], label="FRR")
+        ax.axvline(result['threshold'], color="gray", linestyle="--", label=f"threshold {result['threshold']:.3f}")
+        ax.set_title(f"{model_name} / {metric} (EER {result['eer']:.2%})")
+        ax.set_xlabel("Distance threshold")
+        ax.set_yscale("log")
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure FAR/FRR/EER and recommend a recognition threshold.")
+    parser.add_argument(
+        "source",
+        help="Directory with one subdirectory of images per person, or CSV with label,image_path columns",
+    )
+    parser.add_argument("--models", nargs="+", default=[config.RECOGNITION_MODEL], help="Recognition models to compare")
+    parser.add_argument("--metrics", nargs="+", default=list(METRICS), choices=METRICS, help="Distance metrics")
+    parser.add_argument("--target-far", type=float, default=config.CALIBRATION_TARGET_FAR,
+                        help="False accept rate the recommended threshold must not exceed")
+    parser.add_argument("--eer", action="store_true", help="Recommend the EER threshold instead")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write cached embeddings")
+    parser.add_argument("--output", help="JSON report file with the FAR/FRR curves")
+    parser.add_argument("--plot", action="store_true", help="Save FAR/FRR curves to graphs/")
+    args = parser.parse_args()
+
+    target_far = None if args.eer else args.target_far
+    report = {}
+    for model_name in args.models:
+        result = calibrate_dataset(
+            args.source, model_name, tuple(args.metrics), target_far,
+            cache_dir=None if args.no_cache else config.CALIBRATION_CACHE_DIR,
+        )
+        print(f"\n=== {model_name}: {result['images']} images, {result['identities']} identities, "
+              f"{result['failed']} failed ===")
+        print(f"{'metric':<14} {'genuine':>9} {'impostor':>11} {'EER':>7} {'EER thr':>8} "
+              f"{'threshold':>10} {'FAR':>8} {'FRR':>8}")
+        for metric, stats in result['metrics'].items():
+            print(f"{metric:<14} {stats['genuine_pairs']:>9} {stats['impostor_pairs']:>11} {stats['eer']:>7.2%} "
+                  f"{stats['eer_threshold']:>8.4f} {stats['threshold']:>10.4f} {stats['far']:>8.3%} {stats['frr']:>8.2%}")
+
+        if args.plot:
+            plot_curves(model_name, result['metrics'], os.path.join(config.BASE_DIR, "graphs", f"calibration_{model_name}.png"))
+
+        for stats in result['metrics'].values():
+            rates = stats.pop('rates')
+            step = max(1, len(rates['thresholds']) // CURVE_POINTS)
+            stats['curve'] = {key: values[::step].tolist() for key, values in rates.items()}
+        report[model_name] = result
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
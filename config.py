@@ -5,14 +5,71 @@ import os
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATABASE_PATH = os.path.join(BASE_DIR, "database", "embeddings.db")
+ANN_INDEX_PATH = os.path.join(BASE_DIR, "database", "embeddings.ivf.npz")
+GALLERY_SNAPSHOT_PATH = os.path.join(BASE_DIR, "database", "embeddings.snapshot")  # None = disable
 
 # Face Detection
 DETECTOR_BACKEND = "opencv"  # Options: opencv, mtcnn, retinaface, ssd
 
+# Face Tracking (live preview)
+TRACKING_ENABLED = True  # Track faces between detections instead of detecting every frame
+TRACKING_DETECT_EVERY = 10  # Full detection at least every N frames
+TRACKING_MIN_SCORE = 0.6  # Template-match score below which full detection runs again
+
+# Adaptive Detection
+DETECTION_ADAPTIVE = False  # Detect on a downscaled frame or a window around the last faces
+DETECTION_TARGET_FPS = 15  # Detector rate the downscale factor adapts to
+DETECTION_MIN_SCALE = 0.25  # Lowest downscale factor, small faces are missed below this
+DETECTION_ROI_MARGIN = 0.5  # Window padding around the last faces, as a fraction of box size
+DETECTION_FULL_EVERY = 10  # Full-frame pass at least every N detections
+
 # Face Recognition
 RECOGNITION_MODEL = "Facenet"  # Options: VGG-Face, Facenet, Facenet512, ArcFace
 DISTANCE_METRIC = "cosine"  # Options: cosine, euclidean, euclidean_l2
 RECOGNITION_THRESHOLD = 0.40  # Lower = stricter matching
+MAX_TEMPLATES_PER_USER = 5  # Embeddings kept per user, oldest are pruned first
+TEMPLATE_RERANK_K = 5  # Gallery candidates re-scored against their users' templates
+CLAIM_FALLBACK_SEARCH = False  # When a claimed-identity (1:1) check fails, also run 1:N identification
+
+# SQLite
+SQLITE_JOURNAL_MODE = "WAL"  # WAL lets readers run alongside a writer
+SQLITE_SYNCHRONOUS = "NORMAL"  # NORMAL is durable across app crashes in WAL mode; FULL also across power loss
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the database file read through mmap
+SQLITE_CACHE_SIZE_KB = 64 * 1024  # Page cache per connection
+SQLITE_CACHED_STATEMENTS = 128  # Prepared statements kept per connection
+SQLITE_BUSY_TIMEOUT = 5.0  # Seconds to wait for another writer's lock
+
+# Embedding Cache
+EMBEDDING_CACHE_SIZE = 256  # Cached embeddings in memory, 0 = disable
+EMBEDDING_CACHE_MODE = "exact"  # Options: exact (same pixels), phash (near-identical images)
+EMBEDDING_CACHE_PHASH_DISTANCE = 4  # Max differing perceptual-hash bits (of 64) in phash mode
+EMBEDDING_CACHE_EVICTION = "lru"  # Options: lru, fifo
+EMBEDDING_CACHE_DIR = None  # Directory for an on-disk tier, None = memory only
+
+# Embedding Storage
+EMBEDDING_DTYPE = "float32"  # Options: float64, float32, float16, int8 (per-vector scale)
+
+# Gallery Search
+SEARCH_MODE = "exact"  # Options: exact, ivf (approximate, for very large galleries), sharded (multi-process exact)
+IVF_NLIST = None  # Number of coarse centroids, None = 4 * sqrt(N)
+IVF_NPROBE = 8  # Lists scanned per query, higher = better recall, slower
+SEARCH_SHARDS = None  # Worker processes for sharded search, None = CPU count
+SHARD_MIN_ROWS = 50000  # Rows per shard below which fewer shards (or none) are used
+
+# Recognition Service
+SERVICE_HOST = "127.0.0.1"  # Local only by default
+SERVICE_PORT = 8080
+SERVICE_MAX_BATCH = 16  # Max face crops per embedding call
+SERVICE_MAX_WAIT_MS = 5  # Max time a crop waits for its batch to fill
+SERVICE_DETECT_WORKERS = 2  # Threads running face detection
+
+# Metrics
+METRICS_ENABLED = False  # Record per-stage latency and event counters
+METRICS_LOG_INTERVAL = 60  # Seconds between logged metric summaries, 0 = never
+
+# Threshold Calibration
+CALIBRATION_TARGET_FAR = 0.001  # Recommended threshold keeps the false accept rate at or below this, None = EER
+CALIBRATION_CACHE_DIR = os.path.join(BASE_DIR, "database", "calibration_cache")  # Embedding cache, None = disable
 
 # Camera
 CAMERA_INDEX = 0
@@ -0,0 +1,36 @@
+"""Face ID Recognition System - Export or import the gallery as a chunked .npz archive."""
+
+import argparse
+
+from modules import DataManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move a gallery between nodes without copying the SQLite file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write users, names, timestamps and templates to an archive")
+    export_parser.add_argument("path", help="Archive file to write (.npz)")
+    export_parser.add_argument("--chunk-size", type=int, default=1000, help="Users per chunk")
+    export_parser.add_argument("--dtype", choices=("float32", "float64"), default="float32",
+                               help="Embedding dtype in the archive")
+
+    import_parser = subparsers.add_parser("import", help="Load an archive, skipping user IDs already present")
+    import_parser.add_argument("path", help="Archive file to read (.npz)")
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    data_manager.connect()
+    try:
+        if args.command == "export":
+            meta = data_manager.export_gallery(args.path, args.chunk_size, args.dtype)
+            print(f"Exported {meta['count']} users ({meta['templates']} templates) in {meta['chunks']} chunks.")
+        else:
+            summary = data_manager.import_gallery(args.path)
+            print(f"Imported {summary['imported']} users, {summary['skipped']} already present.")
+    finally:
+        data_manager.close()
+
+
+if __name__ == "__main__":
+    main()
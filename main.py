@@ -1,11 +1,26 @@
 """Face ID Recognition System - GUI Application."""
 
+import logging
+import time
 import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
 from tkinter import messagebox
 from PIL import Image, ImageTk
 import cv2
 
-from modules import FaceDetector, FaceRecognizer, UserRegistration, DataManager
+import config
+from modules import (
+    FaceDetector, AdaptiveDetector, FaceRecognizer, UserRegistration, DataManager,
+    FacePipeline, PreviewPipeline, FaceTracker,
+)
+from modules.metrics import metrics
+
+# UI poll interval for new preview frames; faster than camera FPS so no frame waits long
+PREVIEW_POLL_MS = 10
+# UI poll interval for finished registration/verification tasks
+TASK_POLL_MS = 20
+# Users fetched per page of the user list; more are loaded when scrolled near the end
+USER_LIST_PAGE_SIZE = 100
 
 
 class FaceIDApp:
@@ -17,10 +32,18 @@ class FaceIDApp:
         self.root.resizable(False, False)
 
         # Initialize modules
-        self.detector = FaceDetector()
+        self.detector = AdaptiveDetector() if config.DETECTION_ADAPTIVE else FaceDetector()
         self.recognizer = FaceRecognizer()
         self.data_manager = DataManager()
+        self.pipeline = FacePipeline(self.detector, self.recognizer)
+        self.tracker = FaceTracker(self.detector) if config.TRACKING_ENABLED else None
+        self.preview = PreviewPipeline(self.detector, self.tracker)
+
+        # Registration/verification run on one worker thread; DataManager gives
+        # it its own connection, so the UI thread's list queries never block on it
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recognition")
         self.registration = UserRegistration(self.detector, self.recognizer, self.data_manager)
+        self.pending_task = None
 
         self.data_manager.connect()
 
@@ -78,10 +101,30 @@ class FaceIDApp:
         list_frame = tk.Frame(self.root)
         list_frame.pack(pady=10, fill=tk.X, padx=20)
 
-        tk.Label(list_frame, text="Registered Users:").pack(anchor=tk.W)
+        search_frame = tk.Frame(list_frame)
+        search_frame.pack(fill=tk.X)
+
+        tk.Label(search_frame, text="Registered Users:").pack(side=tk.LEFT)
+        self.search_entry = tk.Entry(search_frame, width=20)
+        self.search_entry.pack(side=tk.RIGHT)
+        self.search_entry.bind("<KeyRelease>", lambda _: self.refresh_user_list())
+        tk.Label(search_frame, text="Search:").pack(side=tk.RIGHT, padx=5)
+
+        listbox_frame = tk.Frame(list_frame)
+        listbox_frame.pack(fill=tk.X, pady=5)
+
+        scrollbar = tk.Scrollbar(listbox_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.user_listbox = tk.Listbox(listbox_frame, height=5, yscrollcommand=lambda first, last: (
+            scrollbar.set(first, last), self._on_user_list_scroll(float(last))
+        ))
+        self.user_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        scrollbar.config(command=self.user_listbox.yview)
 
-        self.user_listbox = tk.Listbox(list_frame, height=5)
-        self.user_listbox.pack(fill=tk.X, pady=5)
+        # Lazy-loading state: IDs shown so far and whether the last page was reached
+        self.listed_user_ids = []
+        self.user_list_done = False
+        self.user_page_pending = False
 
         list_btn_frame = tk.Frame(list_frame)
         list_btn_frame.pack(fill=tk.X)
@@ -100,11 +143,12 @@ class FaceIDApp:
             messagebox.showwarning("Input Error", "Please enter User ID and Name.")
             return
 
+        self.current_mode = 'register'
         if self.data_manager.user_exists(user_id):
-            messagebox.showwarning("Error", "User ID already exists.")
-            return
+            if not messagebox.askyesno("User Exists", f"User ID '{user_id}' already exists. Add another face template?"):
+                return
+            self.current_mode = 'template'
 
-        self.current_mode = 'register'
         self._start_camera()
         self.status_var.set("Position your face and click Capture")
 
@@ -112,7 +156,7 @@ class FaceIDApp:
         """Start camera for verification."""
         self.current_mode = 'verify'
         self._start_camera()
-        self.status_var.set("Position your face and click Capture")
+        self.status_var.set("Position your face and click Capture (with a User ID, only that user is checked)")
 
     def _start_camera(self):
         """Initialize and start camera feed."""
@@ -126,86 +170,239 @@ class FaceIDApp:
         self.register_btn.config(state=tk.DISABLED)
         self.verify_btn.config(state=tk.DISABLED)
 
+        # Capture and detection run on worker threads; the UI only displays
+        self.preview.start()
         self._update_frame()
 
     def _update_frame(self):
-        """Update camera frame in UI."""
+        """Show the newest captured frame with the last known face box."""
         if not self.camera_running:
             return
 
-        frame = self.detector.get_frame()
+        frame, face_data = self.preview.get_display()
         if frame is not None:
-            # Detect face and draw bbox
-            face_data = self.detector.detect_face(frame)
-            if face_data:
-                frame = self.detector.draw_bbox(frame, face_data['region'])
-
-            # Convert to tkinter format
+            # Convert to tkinter format (new array, so the shared frame is not drawn on)
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if face_data:
+                # Label tracked faces with the identity verified for their track
+                identity = face_data.get('identity')
+                label = identity[0]['name'] if identity else ""
+                frame_rgb = self.detector.draw_bbox(frame_rgb, face_data['region'], label)
             img = Image.fromarray(frame_rgb)
             imgtk = ImageTk.PhotoImage(image=img)
 
             self.camera_label.imgtk = imgtk
             self.camera_label.configure(image=imgtk)
 
-        self.root.after(30, self._update_frame)
+        self.root.after(PREVIEW_POLL_MS, self._update_frame)
 
     def capture(self):
-        """Capture current frame and process."""
-        frame = self.detector.get_frame()
+        """Capture current frame and process it on the worker thread."""
+        if self.pending_task and not self.pending_task.done():
+            # Coalesce: clicks while a capture is being processed are ignored
+            return
+
+        frame = self.preview.latest_frame
         if frame is None:
             messagebox.showerror("Error", "Failed to capture frame.")
             return
 
         if self.current_mode == 'register':
-            self._process_registration(frame)
+            user_id = self.user_id_entry.get().strip()
+            name = self.name_entry.get().strip()
+            task = self.executor.submit(self._process_registration, user_id, name, frame)
+            on_done = self._on_registration_done
+        elif self.current_mode == 'template':
+            user_id = self.user_id_entry.get().strip()
+            task = self.executor.submit(self._process_template, user_id, frame)
+            on_done = self._on_registration_done
         elif self.current_mode == 'verify':
-            self._process_verification(frame)
+            face_data = self.preview.face_data
+            track_id = face_data.get('track_id') if face_data else None
+            claimed_id = self.user_id_entry.get().strip() or None
+            identity = face_data.get('identity') if face_data else None
+            if identity is not None and claimed_id is None:
+                user, distance, version = identity
+                if version == self.data_manager.current_version():
+                    # Same track as an earlier match and no user changed since: nothing to recompute
+                    result = {'status': 'match', 'matches': [(user, distance)], 'unknown': 0,
+                              'version': version, 'timings': {}}
+                    self._on_verification_done(result, track_id)
+                    return
+                # Users were added, changed or deleted meanwhile; verify again
+                self.tracker.clear_identity()
+            task = self.executor.submit(self._process_verification, frame, claimed_id)
+            on_done = lambda result: self._on_verification_done(result, track_id)
+        else:
+            return
 
-    def _process_registration(self, frame):
-        """Process registration with captured frame."""
-        user_id = self.user_id_entry.get().strip()
-        name = self.name_entry.get().strip()
+        self.pending_task = task
+        self.capture_btn.config(state=tk.DISABLED)
+        self.status_var.set("Processing...")
+        self._poll_task(task, on_done)
+
+    def _poll_task(self, task: Future, on_done):
+        """Wait for a worker task without blocking Tk, then run on_done on the UI thread."""
+        if not task.done():
+            self.root.after(TASK_POLL_MS, self._poll_task, task, on_done)
+            return
 
+        self.pending_task = None
+        if self.camera_running:
+            self.capture_btn.config(state=tk.NORMAL)
+
+        try:
+            result = task.result()
+        except Exception as e:
+            self.status_var.set("Processing failed")
+            messagebox.showerror("Error", f"Processing failed: {e}")
+            return
+
+        on_done(result)
+
+    def _process_registration(self, user_id: str, name: str, frame) -> dict:
+        """Register user from captured frame. Runs on the worker thread."""
+        start_time = time.perf_counter()
         success, message = self.registration.register_from_image(user_id, name, frame)
+        timings = {'register': (time.perf_counter() - start_time) * 1000}
+
+        return {'success': success, 'message': message, 'timings': timings}
+
+    def _process_template(self, user_id: str, frame) -> dict:
+        """Add a face template for an existing user. Runs on the worker thread."""
+        start_time = time.perf_counter()
+        success, message = self.registration.add_template_from_image(user_id, frame)
+        timings = {'register': (time.perf_counter() - start_time) * 1000}
 
-        if success:
-            messagebox.showinfo("Success", message)
+        return {'success': success, 'message': message, 'timings': timings}
+
+    def _on_registration_done(self, result: dict):
+        """Show registration result. Runs on the UI thread."""
+        if result['success']:
+            messagebox.showinfo("Success", result['message'])
             self.user_id_entry.delete(0, tk.END)
             self.name_entry.delete(0, tk.END)
             self.refresh_user_list()
             self.stop_camera()
+            self.status_var.set(f"Registered ({self._format_timings(result['timings'])})")
         else:
-            messagebox.showerror("Error", message)
-
-    def _process_verification(self, frame):
-        """Process verification with captured frame."""
-        # Extract embedding from frame
-        embedding = self.recognizer.extract_embedding(frame)
-        if embedding is None:
+            self.status_var.set(f"Registration failed ({self._format_timings(result['timings'])})")
+            messagebox.showerror("Error", result['message'])
+
+    def _process_verification(self, frame, claimed_id: str | None = None) -> dict:
+        """
+        Identify every face in captured frame, or with claimed_id check the faces 1:1
+        against that user only (falling back to 1:N if CLAIM_FALLBACK_SEARCH).
+        Runs on the worker thread.
+        """
+        timings = {}
+        # Read before any user data, so a cached result is never newer than its version
+        result = {'status': None, 'timings': timings, 'version': self.data_manager.current_version()}
+
+        # Detect all faces once and embed their crops in one batch
+        faces = self.pipeline.process_all(frame, timings)
+        if not faces:
+            result['status'] = 'no_face'
+            return result
+
+        embedded = [face for face in faces if face['embedding'] is not None]
+        if not embedded:
+            result['status'] = 'no_embedding'
+            return result
+
+        if claimed_id is not None:
+            start_time = time.perf_counter()
+            templates = self.data_manager.get_user_templates(claimed_id)
+            if templates is None:
+                result.update(status='unknown_claim', claimed_id=claimed_id)
+                return result
+            verified, distance = min(
+                (self.recognizer.verify_claim(face['embedding'], templates) for face in embedded),
+                key=lambda found: found[1],
+            )
+            timings['verify'] = (time.perf_counter() - start_time) * 1000
+            if verified:
+                user = self.data_manager.get_user(claimed_id)
+                result.update(status='match', matches=[(user, distance)], unknown=0)
+                return result
+
+            result['claim_rejected'] = claimed_id
+            if not config.CLAIM_FALLBACK_SEARCH:
+                result['status'] = 'unknown'
+                return result
+
+        # Get resident gallery, synced with changes since the last verification
+        start_time = time.perf_counter()
+        stored = self.data_manager.get_gallery()
+        timings['gallery'] = (time.perf_counter() - start_time) * 1000
+        if len(stored) == 0:
+            result['status'] = 'no_users'
+            return result
+
+        # Match all faces together
+        self.pipeline.identify_all(embedded, stored, timings, templates=self.data_manager.get_templates)
+        matches = [
+            (self.data_manager.get_user(face['match'][0]), face['match'][1])
+            for face in embedded
+            if face['match']
+        ]
+        result.update(
+            status='match' if matches else 'unknown',
+            matches=matches,
+            unknown=len(faces) - len(matches),
+        )
+
+        return result
+
+    def _on_verification_done(self, result: dict, track_id: int | None = None):
+        """Show verification result. Runs on the UI thread."""
+        timings = self._format_timings(result['timings'])
+
+        if result['status'] == 'no_face':
+            self.status_var.set(f"No face detected ({timings})")
             messagebox.showerror("Error", "No face detected.")
-            return
-
-        # Get all stored embeddings
-        stored = self.data_manager.get_all_embeddings()
-        if not stored:
+        elif result['status'] == 'no_embedding':
+            self.status_var.set(f"Embedding failed ({timings})")
+            messagebox.showerror("Error", "Failed to extract face embedding.")
+        elif result['status'] == 'no_users':
+            self.status_var.set(f"No registered users ({timings})")
             messagebox.showinfo("Info", "No registered users.")
-            return
-
-        # Find match
-        match = self.recognizer.find_match(embedding, stored)
-        if match:
-            user_id, distance = match
-            user = self.data_manager.get_user(user_id)
-            self.status_var.set(f"Verified: {user['name']} ({user_id})")
-            messagebox.showinfo("Verified", f"Welcome, {user['name']}!\nConfidence: {1 - distance:.2%}")
+        elif result['status'] == 'unknown_claim':
+            self.status_var.set(f"Unknown User ID ({timings})")
+            messagebox.showerror("Error", f"User ID '{result['claimed_id']}' does not exist.")
+        elif result['status'] == 'match':
+            matches = result['matches']
+            if self.tracker and track_id is not None and len(matches) == 1 and result['unknown'] == 0:
+                self.tracker.set_identity(track_id, (*matches[0], result['version']))
+
+            verified = ", ".join(f"{user['name']} ({user['user_id']})" for user, _ in matches)
+            self.status_var.set(f"Verified: {verified} - {timings or 'tracked face'}")
+
+            names = ", ".join(user['name'] for user, _ in matches)
+            confidences = "\n".join(f"{user['name']}: {1 - distance:.2%}" for user, distance in matches)
+            message = f"Welcome, {names}!\nConfidence: {1 - matches[0][1]:.2%}" if len(matches) == 1 \
+                else f"Welcome, {names}!\n{confidences}"
+            if result['unknown']:
+                message += f"\n{result['unknown']} face(s) not recognized."
+            if result.get('claim_rejected'):
+                message = f"Face does not match '{result['claim_rejected']}'.\n{message}"
+            messagebox.showinfo("Verified", message)
+        elif result.get('claim_rejected'):
+            self.status_var.set(f"Verification failed - Not '{result['claim_rejected']}' ({timings})")
+            messagebox.showwarning("Failed", f"Face does not match '{result['claim_rejected']}'.")
         else:
-            self.status_var.set("Verification failed - Unknown face")
+            self.status_var.set(f"Verification failed - Unknown face ({timings})")
             messagebox.showwarning("Failed", "Face not recognized.")
 
+    @staticmethod
+    def _format_timings(timings: dict) -> str:
+        """Format stage timings for the status bar, e.g. 'detect 42 ms, embed 95 ms'."""
+        return ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in timings.items())
+
     def stop_camera(self):
         """Stop camera feed."""
         self.camera_running = False
+        self.preview.stop()
         self.detector.stop_camera()
         self.current_mode = None
 
@@ -219,12 +416,32 @@ class FaceIDApp:
         self.status_var.set("Ready")
 
     def refresh_user_list(self):
-        """Refresh the user listbox."""
+        """Reload the user listbox from the first page, filtered by the search prefix."""
         self.user_listbox.delete(0, tk.END)
-        embeddings = self.data_manager.get_all_embeddings()
-        for user_id, _ in embeddings:
-            user = self.data_manager.get_user(user_id)
-            self.user_listbox.insert(tk.END, f"{user_id} - {user['name']}")
+        self.listed_user_ids = []
+        self.user_list_done = False
+        self._load_user_page()
+
+    def _load_user_page(self):
+        """Append the next page of users (metadata only) to the listbox."""
+        self.user_page_pending = False
+        if self.user_list_done:
+            return
+        users = self.data_manager.list_users(
+            limit=USER_LIST_PAGE_SIZE,
+            after=self.listed_user_ids[-1] if self.listed_user_ids else None,
+            prefix=self.search_entry.get().strip() or None,
+        )
+        for user in users:
+            self.listed_user_ids.append(user['user_id'])
+            self.user_listbox.insert(tk.END, f"{user['user_id']} - {user['name']}")
+        self.user_list_done = len(users) < USER_LIST_PAGE_SIZE
+
+    def _on_user_list_scroll(self, last: float):
+        """Load the next page once the bottom of the loaded part is in view."""
+        if last > 0.9 and not self.user_list_done and not self.user_page_pending:
+            self.user_page_pending = True
+            self.root.after_idle(self._load_user_page)
 
     def delete_selected_user(self):
         """Delete selected user from list."""
@@ -233,22 +450,28 @@ class FaceIDApp:
             messagebox.showwarning("Warning", "Please select a user.")
             return
 
-        item = self.user_listbox.get(selection[0])
-        user_id = item.split(" - ")[0]
+        user_id = self.listed_user_ids[selection[0]]
 
         if messagebox.askyesno("Confirm", f"Delete user '{user_id}'?"):
             if self.data_manager.delete_user(user_id):
+                if self.tracker:
+                    # The preview label may name the deleted user
+                    self.tracker.clear_identity()
                 self.refresh_user_list()
                 messagebox.showinfo("Success", "User deleted.")
 
     def on_closing(self):
         """Cleanup on window close."""
         self.stop_camera()
+        self.executor.shutdown(wait=True)
         self.data_manager.close()
         self.root.destroy()
 
 
 def main():
+    logging.basicConfig(level=logging.INFO)
+    metrics.start_log_summary()
+
     root = tk.Tk()
     app = FaceIDApp(root)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
@@ -1,6 +1,18 @@
 """Face ID Recognition System modules."""
 
 from .face_detection import FaceDetector
+from .adaptive_detector import AdaptiveDetector
 from .face_recognition import FaceRecognizer
+from .embedding_cache import EmbeddingCache
 from .user_registration import UserRegistration
-from .data_manager import DataManager
\ No newline at end of file
+from .data_manager import DataManager
+from .face_pipeline import FacePipeline
+from .preview_pipeline import PreviewPipeline
+from .face_tracker import FaceTracker
+from .gallery_index import GalleryIndex
+from .ivf_index import IVFIndex
+from .sharded_index import ShardedIndex
+from .bulk_enrollment import BulkEnrollment
+from .stream_recognition import StreamRecognizer
+from .recognition_service import RecognitionService
+from .metrics import Metrics
\ No newline at end of file
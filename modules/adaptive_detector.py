@@ -0,0 +1,205 @@
+"""Adaptive Detector Module - Face detection on a downscaled frame or ROI, re-projected to full resolution."""
+
+import math
+import threading
+import time
+import cv2
+import numpy as np
+import config
+from .face_detection import FaceDetector
+from .metrics import metrics
+
+
+class AdaptiveDetector(FaceDetector):
+    """
+    FaceDetector that runs DeepFace on a downscaled copy of the frame, or only on a
+    window around the faces found last time, and maps the boxes back to full-resolution
+    coordinates. Crops for embedding always come from DeepFace at full resolution, exactly
+    as FaceDetector makes them, so probes match templates enrolled by any detector.
+    The scale follows the measured full-frame detector latency so detection keeps up
+    with target_fps. A full-frame pass runs at least every full_every detections, and
+    whenever the window comes up empty, so new faces are still found.
+    """
+
+    def __init__(
+        self,
+        camera_index: int = config.CAMERA_INDEX,
+        target_fps: float = config.DETECTION_TARGET_FPS,
+        min_scale: float = config.DETECTION_MIN_SCALE,
+        max_scale: float = 1.0,
+        roi_margin: float = config.DETECTION_ROI_MARGIN,
+        full_every: int = config.DETECTION_FULL_EVERY,
+        smoothing: float = 0.3,
+    ):
+        super().__init__(camera_index)
+        self.target_fps = target_fps
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.roi_margin = roi_margin
+        self.full_every = full_every
+        self.smoothing = smoothing
+
+        self.scale = max_scale
+        self.latency_ms = None  # Smoothed full-frame detector latency at the current scale
+        self._warmed_up = False
+        self._regions: list[dict] = []
+        self._shape = None
+        self._since_full = 0
+        self._lock = threading.Lock()
+
+        # Counters for measuring how often the window is enough
+        self.full_passes = 0
+        self.roi_passes = 0
+
+    def reset(self) -> None:
+        """Forget the last faces so the next call scans the full frame. Keeps the scale."""
+        with self._lock:
+            self._regions = []
+            self._shape = None
+            self._since_full = 0
+
+    @metrics.timed("detect")
+    def detect_faces(self, frame: np.ndarray) -> list[dict]:
+        """
+        Detect all faces in frame, on a window around the last faces when possible.
+        Returns list of dicts shaped like FaceDetector.detect_face(), in full-res coordinates.
+        """
+        frame_h, frame_w = frame.shape[:2]
+        with self._lock:
+            scale = self.scale
+            window = self._window(frame.shape[:2])
+
+        faces = None
+        if window is not None:
+            faces = self._detect_in(frame, window, scale)
+        roi_hit = bool(faces)
+        full_pass = False
+        if not faces:
+            start_time = time.perf_counter()
+            faces = self._detect_in(frame, (0, 0, frame_w, frame_h), scale)
+            if faces is not None:
+                full_pass = True
+                self._adapt((time.perf_counter() - start_time) * 1000)
+            window = None
+
+        faces = faces or []
+        with self._lock:
+            self.roi_passes += roi_hit
+            self.full_passes += full_pass
+            self._regions = [face['region'] for face in faces]
+            self._shape = frame.shape[:2]
+            self._since_full = self._since_full + 1 if window is not None else 0
+
+        metrics.increment("detections", len(faces))
+        metrics.set_gauge("detect_scale", scale)
+
+        return faces
+
+    def _window(self, shape: tuple) -> tuple[int, int, int, int] | None:
+        """(x0, y0, x1, y1) around the last faces, or None if a full-frame pass is due."""
+        if not self._regions or self._shape != shape or self._since_full >= self.full_every:
+            return None
+
+        frame_h, frame_w = shape
+        x0 = min(r['x'] - int(r['w'] * self.roi_margin) for r in self._regions)
+        y0 = min(r['y'] - int(r['h'] * self.roi_margin) for r in self._regions)
+        x1 = max(r['x'] + r['w'] + int(r['w'] * self.roi_margin) for r in self._regions)
+        y1 = max(r['y'] + r['h'] + int(r['h'] * self.roi_margin) for r in self._regions)
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(frame_w, x1), min(frame_h, y1)
+
+        # A window covering most of the frame saves nothing over a full pass
+        if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) > 0.6 * frame_w * frame_h:
+            return None
+
+        return (x0, y0, x1, y1)
+
+    def _detect_in(self, frame: np.ndarray, window: tuple, scale: float) -> list[dict] | None:
+        """Run the detector on window of frame at scale. None if the detector failed."""
+        x0, y0, x1, y1 = window
+        image = frame[y0:y1, x0:x1]
+        if scale < 1:
+            size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+        faces = self.run_detector(image)
+        if faces is None:
+            return None
+
+        fx, fy = (x1 - x0) / image.shape[1], (y1 - y0) / image.shape[0]
+        detected = []
+        for face in faces:
+            region = self._project(face['facial_area'], fx, fy, x0, y0, frame.shape[:2])
+            if fx != 1 or fy != 1:
+                # Downscaled pass: align and crop again from full-resolution pixels
+                face, region = self._full_res_face(frame, region)
+                if face is None:
+                    continue
+            detected.append({
+                'face': face['face'],
+                'crop': self.face_to_bgr(face['face']),
+                'region': region,
+            })
+
+        return detected
+
+    def _full_res_face(self, frame: np.ndarray, region: dict) -> tuple[dict | None, dict]:
+        """
+        Run the detector on a padded full-resolution patch around region, so the aligned
+        face is the one FaceDetector would extract. Costs one detector call on a small patch.
+        Returns (DeepFace face nearest to region or None, its full-frame region).
+        """
+        x, y, w, h = region['x'], region['y'], region['w'], region['h']
+        frame_h, frame_w = frame.shape[:2]
+        pad = max(w, h) // 2
+        px0, py0 = max(0, x - pad), max(0, y - pad)
+        px1, py1 = min(frame_w, x + w + pad), min(frame_h, y + h + pad)
+        faces = self.run_detector(frame[py0:py1, px0:px1]) if px1 > px0 and py1 > py0 else None
+        if not faces:
+            return None, region
+
+        center = (x + w / 2 - px0, y + h / 2 - py0)
+        face = min(faces, key=lambda f: (
+            (f['facial_area']['x'] + f['facial_area']['w'] / 2 - center[0]) ** 2
+            + (f['facial_area']['y'] + f['facial_area']['h'] / 2 - center[1]) ** 2
+        ))
+
+        return face, self._project(face['facial_area'], 1, 1, px0, py0, frame.shape[:2])
+
+    def _adapt(self, latency_ms: float) -> None:
+        """Move the scale towards the one whose full-frame latency fits the target FPS."""
+        # The first pass includes model loading
+        if not self._warmed_up:
+            self._warmed_up = True
+            return
+
+        with self._lock:
+            if self.latency_ms is None:
+                self.latency_ms = latency_ms
+            else:
+                self.latency_ms += self.smoothing * (latency_ms - self.latency_ms)
+
+            ratio = (1000 / self.target_fps) / self.latency_ms
+            if 0.8 <= ratio <= 1.25:
+                return
+            # Detector cost grows roughly with pixel count, i.e. with scale squared
+            new_scale = float(np.clip(self.scale * math.sqrt(ratio), self.min_scale, self.max_scale))
+            self.latency_ms *= (new_scale / self.scale) ** 2
+            self.scale = new_scale
+
+    @staticmethod
+    def _project(area: dict, fx: float, fy: float, x0: int, y0: int, shape: tuple) -> dict:
+        """Map a facial_area from detector-image to full-frame coordinates, clipped to the frame."""
+        frame_h, frame_w = shape
+        x = min(max(0, round(x0 + area['x'] * fx)), frame_w - 1)
+        y = min(max(0, round(y0 + area['y'] * fy)), frame_h - 1)
+        region = {
+            'x': x,
+            'y': y,
+            'w': max(1, min(round(area['w'] * fx), frame_w - x)),
+            'h': max(1, min(round(area['h'] * fy), frame_h - y)),
+        }
+        for eye in ('left_eye', 'right_eye'):
+            if area.get(eye) is not None:
+                region[eye] = (round(x0 + area[eye][0] * fx), round(y0 + area[eye][1] * fy))
+
+        return region
@@ -0,0 +1,214 @@
+"""Bulk Enrollment Module - Enrolls many users from image directories or manifest CSVs."""
+
+import csv
+import multiprocessing
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+import cv2
+import numpy as np
+from .face_detection import FaceDetector
+from .face_recognition import FaceRecognizer
+from .data_manager import DataManager
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Per-worker-process detector, created on first use
+_detector = None
+
+
+def _prepare_image(path: str) -> tuple[np.ndarray | None, str]:
+    """
+    Decode image and detect its face. Runs in worker processes.
+    Returns (aligned face crop, "") or (None, error message).
+    """
+    global _detector
+
+    image = cv2.imread(path)
+    if image is None:
+        return (None, "Failed to read image.")
+
+    if _detector is None:
+        _detector = FaceDetector()
+    face_data = _detector.detect_face(image)
+    if face_data is None:
+        return (None, "No face detected in image.")
+
+    return (face_data['crop'], "")
+
+
+def iter_source(
+    source: str, on_invalid: Callable[[tuple[str, str, str], str], None] | None = None
+) -> Iterator[tuple[str, str, str]]:
+    """
+    Stream (user_id, name, image_path) records.
+    source is either a directory of images (file name without extension = user ID and name)
+    or a manifest CSV with user_id, name and image_path columns (relative paths are
+    resolved against the CSV's directory).
+    Manifest rows without a user_id or image_path are passed to on_invalid(record, reason)
+    and skipped; without on_invalid they raise ValueError.
+    """
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    user_id = os.path.splitext(entry.name)[0]
+                    yield (user_id, user_id, entry.path)
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            # Missing header columns and short rows both read as None
+            user_id = (row.get('user_id') or "").strip()
+            name = (row.get('name') or user_id).strip()
+            path = (row.get('image_path') or "").strip()
+            if not user_id or not path:
+                missing = [column for column, value in (("user_id", user_id), ("image_path", path)) if not value]
+                reason = f"Manifest line {line}: missing {' and '.join(missing)}."
+                if on_invalid is None:
+                    raise ValueError(reason)
+                on_invalid((user_id, name, path), reason)
+                continue
+            yield (user_id, name, path if os.path.isabs(path) else os.path.join(base_dir, path))
+
+
+def chunks(items: Iterable, size: int) -> Iterator[list]:
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkEnrollment:
+    """
+    Streams a source in batches: images are decoded and their faces detected in a process
+    pool while the previous batch's crops are embedded in one model call (detection skipped)
+    and written in one transaction.
+    Users already in the database are skipped, so an interrupted run can simply be restarted.
+    """
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        data_manager: DataManager,
+        workers: int | None = None,
+        batch_size: int = 32,
+    ):
+        self.recognizer = recognizer
+        self.data_manager = data_manager
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def run(
+        self,
+        source: str,
+        report_path: str | None = None,
+        on_progress: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """
+        Enroll every record from source. Per-item failures are counted (and written to
+        report_path as CSV if given) without stopping the run.
+        Returns summary dict with 'enrolled', 'skipped' and 'failed' counts.
+        """
+        summary = {'enrolled': 0, 'skipped': 0, 'failed': 0}
+        report_file = open(report_path, "w", newline="") if report_path else None
+        writer = csv.writer(report_file) if report_file else None
+        if writer:
+            writer.writerow(["user_id", "image_path", "reason"])
+
+        def invalid(record: tuple[str, str, str], reason: str) -> None:
+            summary['failed'] += 1
+            if writer:
+                writer.writerow([record[0], record[2], reason])
+
+        try:
+            # Spawned, not forked: the caller may already run camera, UI or server threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+                pending = None
+                for chunk in chunks(iter_source(source, invalid), self.batch_size):
+                    # Resume: anything already stored was committed by an earlier run
+                    existing = self.data_manager.existing_ids([user_id for user_id, _, _ in chunk])
+                    summary['skipped'] += sum(1 for user_id, _, _ in chunk if user_id in existing)
+                    todo = [record for record in chunk if record[0] not in existing]
+                    futures = [pool.submit(_prepare_image, path) for _, _, path in todo]
+
+                    # Embed and store the previous batch while this one is decoded
+                    if pending:
+                        self._finish_batch(*pending, summary, writer)
+                        if on_progress:
+                            on_progress(dict(summary))
+                    pending = (todo, futures)
+
+                if pending:
+                    self._finish_batch(*pending, summary, writer)
+                    if on_progress:
+                        on_progress(dict(summary))
+        finally:
+            if report_file:
+                report_file.close()
+
+        return summary
+
+    def _finish_batch(
+        self,
+        records: list[tuple[str, str, str]],
+        futures: list[Future],
+        summary: dict,
+        writer,
+    ) -> None:
+        """Collect detected crops, embed them in one call and write them in one transaction."""
+        def fail(record: tuple[str, str, str], reason: str) -> None:
+            summary['failed'] += 1
+            if writer:
+                writer.writerow([record[0], record[2], reason])
+
+        ready = []
+        for record, future in zip(records, futures):
+            try:
+                crop, error = future.result()
+            except Exception as e:
+                crop, error = None, f"Worker error: {e}"
+            if crop is None:
+                fail(record, error)
+            else:
+                ready.append((record, crop))
+
+        embeddings = self.recognizer.extract_embeddings([crop for _, crop in ready], skip_detection=True)
+        users = []
+        for (record, _), embedding in zip(ready, embeddings):
+            if embedding is None:
+                fail(record, "Failed to extract face embedding.")
+            else:
+                users.append((record, embedding))
+
+        for (record, _), error in zip(users, self._store(users)):
+            if error is None:
+                summary['enrolled'] += 1
+            else:
+                fail(record, error)
+
+    def _store(self, users: list[tuple[tuple[str, str, str], np.ndarray]]) -> list[str | None]:
+        """Write users in one transaction. Returns a failure reason (or None) per user."""
+        rows = [(record[0], record[1], embedding) for record, embedding in users]
+        try:
+            saved = self.data_manager.add_users(rows)
+        except ValueError:
+            # A rejected record (e.g. wrong dimension) rolled back the batch; isolate it
+            saved = []
+            for row in rows:
+                try:
+                    saved.extend(self.data_manager.add_users([row]))
+                except ValueError as e:
+                    saved.append(str(e))
+
+        return [
+            None if ok is True else ("User ID already exists." if ok is False else ok)
+            for ok in saved
+        ]
@@ -0,0 +1,263 @@
+"""Calibration Module - Genuine/impostor distance statistics, FAR/FRR/EER and threshold selection."""
+
+import csv
+import os
+import tempfile
+from collections.abc import Iterator
+import cv2
+import numpy as np
+import config
+from .embedding_cache import EmbeddingCache
+from .face_detection import FaceDetector
+from .face_recognition import FaceRecognizer
+from .gallery_index import GalleryIndex
+from .bulk_enrollment import IMAGE_EXTENSIONS, chunks
+
+METRICS = ("cosine", "euclidean", "euclidean_l2")
+
+
+def iter_dataset(source: str) -> Iterator[tuple[str, str]]:
+    """
+    Stream (label, image_path) records of a labelled dataset.
+    source is either a directory with one subdirectory of images per identity, or a CSV
+    with label and image_path columns (relative paths are resolved against the CSV's directory).
+    """
+    if os.path.isdir(source):
+        for label in sorted(os.listdir(source)):
+            person_dir = os.path.join(source, label)
+            if not os.path.isdir(person_dir):
+                continue
+            for name in sorted(os.listdir(person_dir)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield (label, os.path.join(person_dir, name))
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="") as f:
+        for row in csv.DictReader(f):
+            path = row['image_path'].strip()
+            yield (row['label'].strip(), path if os.path.isabs(path) else os.path.join(base_dir, path))
+
+
+def embed_dataset(
+    records: list[tuple[str, str]],
+    recognizer: FaceRecognizer,
+    detector: FaceDetector,
+    out_path: str,
+    cache_dir: str | None = None,
+    batch_size: int = 32,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Embed every image once: detect its face and embed the crops in batches.
+    Embeddings are cached on disk per model and detector keyed by image content, so
+    re-running (e.g. with another metric) only decodes the images.
+    Rows are written to a memory-mapped .npy at out_path instead of being kept in memory.
+    Returns (label codes, (n, D) embedding matrix, number of images that failed).
+    """
+    cache = EmbeddingCache(
+        f"calibration/{recognizer.model_name}/{config.DETECTOR_BACKEND}",
+        max_entries=batch_size, mode="exact", disk_dir=cache_dir,
+    ) if cache_dir else None
+    label_codes = {label: code for code, label in enumerate(sorted({label for label, _ in records}))}
+
+    labels = []
+    matrix = None
+    failed = 0
+    for batch in chunks(records, batch_size):
+        images, embeddings = [], []
+        for label, path in batch:
+            image = cv2.imread(path)
+            images.append(image)
+            embeddings.append(cache.get(image, "image") if cache is not None and image is not None else None)
+
+        # Detect and embed only what the cache did not have
+        missing = [i for i, image in enumerate(images) if image is not None and embeddings[i] is None]
+        crops = {i: detector.detect_face(images[i]) for i in missing}
+        crops = {i: face['crop'] for i, face in crops.items() if face is not None}
+        for i, embedding in zip(crops, recognizer.extract_embeddings(list(crops.values()), skip_detection=True)):
+            embeddings[i] = embedding
+            if cache is not None and embedding is not None:
+                cache.put(images[i], embedding, "image")
+
+        for (label, _), embedding in zip(batch, embeddings):
+            if embedding is None:
+                failed += 1
+                continue
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    out_path, mode="w+", dtype=np.float64, shape=(len(records), len(embedding))
+                )
+            matrix[len(labels)] = embedding
+            labels.append(label_codes[label])
+
+    if matrix is None:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0)), failed
+    matrix.flush()
+
+    return np.array(labels, dtype=np.int64), matrix[:len(labels)], failed
+
+
+def distance_range(matrix: np.ndarray, metric: str, chunk_size: int = 4096) -> tuple[float, float]:
+    """Bounds every pairwise distance falls into, used as histogram range."""
+    if metric in ("cosine", "euclidean_l2"):
+        return (0.0, 2.0)
+    max_norm = max(
+        (float(np.linalg.norm(matrix[start:start + chunk_size], axis=1).max())
+         for start in range(0, len(matrix), chunk_size)),
+        default=0.0,
+    )
+
+    return (0.0, 2 * max_norm or 1.0)
+
+
+def pair_histograms(
+    labels: np.ndarray,
+    matrix: np.ndarray,
+    metric: str,
+    bins: int = 10000,
+    block_size: int = 1024,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Histograms of genuine (same label) and impostor distances over all unordered pairs.
+    Distances are computed block by block with matrix products and binned immediately,
+    so memory is bounded by block_size^2 and bins, not by the number of pairs.
+    Returns (bin edges, genuine counts, impostor counts).
+    """
+    low, high = distance_range(matrix, metric)
+    edges = np.linspace(low, high, bins + 1)
+    genuine = np.zeros(bins, dtype=np.int64)
+    impostor = np.zeros(bins, dtype=np.int64)
+    n = len(matrix)
+    if n < 2:
+        return edges, genuine, impostor
+
+    norms = np.concatenate([
+        np.linalg.norm(matrix[start:start + block_size], axis=1) for start in range(0, n, block_size)
+    ])
+    index = GalleryIndex.from_arrays(None, matrix, norms)
+
+    for i_start in range(0, n, block_size):
+        i_end = min(i_start + block_size, n)
+        queries = np.asarray(matrix[i_start:i_end], dtype=np.float64)
+        for j_start in range(i_start, n, block_size):
+            j_end = min(j_start + block_size, n)
+            dists = index.block_distances(queries, j_start, j_end, metric)
+            same = labels[i_start:i_end, None] == labels[None, j_start:j_end]
+            valid = np.isfinite(dists)
+            if j_start == i_start:
+                # Diagonal block: each unordered pair once, no self-pairs
+                valid &= np.triu(np.ones(dists.shape, dtype=bool), k=1)
+
+            scaled = np.where(valid, (dists - low) / (high - low) * bins, 0)
+            bin_index = np.clip(scaled, 0, bins - 1).astype(np.int64)
+            genuine += np.bincount(bin_index[valid & same], minlength=bins)
+            impostor += np.bincount(bin_index[valid & ~same], minlength=bins)
+
+    return edges, genuine, impostor
+
+
+def error_rates(edges: np.ndarray, genuine: np.ndarray, impostor: np.ndarray) -> dict:
+    """
+    FAR and FRR at every bin edge used as threshold (accept if distance < threshold).
+    Returns {'thresholds', 'far', 'frr'} arrays of len(edges).
+    """
+    # Counts strictly below each edge
+    genuine_below = np.concatenate([[0], np.cumsum(genuine)])
+    impostor_below = np.concatenate([[0], np.cumsum(impostor)])
+    n_genuine, n_impostor = max(int(genuine.sum()), 1), max(int(impostor.sum()), 1)
+
+    return {
+        'thresholds': edges,
+        'far': impostor_below / n_impostor,
+        'frr': 1 - genuine_below / n_genuine,
+    }
+
+
+def equal_error_rate(rates: dict) -> tuple[float, float]:
+    """(EER, threshold) where FAR and FRR cross, interpolated between bin edges."""
+    diff = rates['far'] - rates['frr']
+    i = int(np.argmax(diff >= 0))
+    if i == 0:
+        return float((rates['far'][0] + rates['frr'][0]) / 2), float(rates['thresholds'][0])
+
+    # Linear interpolation between edge i-1 (FAR < FRR) and edge i (FAR >= FRR)
+    t = diff[i - 1] / (diff[i - 1] - diff[i]) if diff[i] != diff[i - 1] else 0.0
+    eer = rates['far'][i - 1] + t * (rates['far'][i] - rates['far'][i - 1])
+    threshold = rates['thresholds'][i - 1] + t * (rates['thresholds'][i] - rates['thresholds'][i - 1])
+
+    return float(eer), float(threshold)
+
+
+def threshold_at_far(rates: dict, target_far: float) -> tuple[float, float, float]:
+    """Largest threshold whose FAR stays <= target_far. Returns (threshold, FAR, FRR)."""
+    i = int(np.searchsorted(rates['far'], target_far, side="right")) - 1
+    i = max(i, 0)
+
+    return float(rates['thresholds'][i]), float(rates['far'][i]), float(rates['frr'][i])
+
+
+def calibrate(
+    labels: np.ndarray,
+    matrix: np.ndarray,
+    metrics: tuple[str, ...] = METRICS,
+    target_far: float = config.CALIBRATION_TARGET_FAR,
+    bins: int = 10000,
+    block_size: int = 1024,
+) -> dict:
+    """
+    Error statistics per metric for embedded labelled data.
+    The recommended threshold keeps FAR at or below target_far (the EER threshold if None).
+    Returns {metric: {'genuine_pairs', 'impostor_pairs', 'eer', 'eer_threshold',
+    'threshold', 'far', 'frr', 'rates'}}.
+    """
+    results = {}
+    for metric in metrics:
+        edges, genuine, impostor = pair_histograms(labels, matrix, metric, bins, block_size)
+        rates = error_rates(edges, genuine, impostor)
+        eer, eer_threshold = equal_error_rate(rates)
+        if target_far is None:
+            threshold = eer_threshold
+            far, frr = eer, eer
+        else:
+            threshold, far, frr = threshold_at_far(rates, target_far)
+        results[metric] = {
+            'genuine_pairs': int(genuine.sum()),
+            'impostor_pairs': int(impostor.sum()),
+            'eer': eer,
+            'eer_threshold': eer_threshold,
+            'threshold': threshold,
+            'far': far,
+            'frr': frr,
+            'rates': rates,
+        }
+
+    return results
+
+
+def calibrate_dataset(
+    source: str,
+    model_name: str = config.RECOGNITION_MODEL,
+    metrics: tuple[str, ...] = METRICS,
+    target_far: float = config.CALIBRATION_TARGET_FAR,
+    cache_dir: str | None = config.CALIBRATION_CACHE_DIR,
+    batch_size: int = 32,
+) -> dict:
+    """
+    Embed a labelled dataset with model_name and calibrate every metric on it.
+    Returns calibrate() results plus 'images', 'identities' and 'failed'.
+    """
+    records = list(iter_dataset(source))
+    recognizer = FaceRecognizer(model_name=model_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        labels, matrix, failed = embed_dataset(
+            records, recognizer, FaceDetector(), os.path.join(tmp, "embeddings.npy"), cache_dir, batch_size
+        )
+        results = calibrate(labels, matrix, metrics, target_far)
+        del matrix
+
+    return {
+        'images': len(records),
+        'identities': len({label for label, _ in records}),
+        'failed': failed,
+        'metrics': results,
+    }
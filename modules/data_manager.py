@@ -1,31 +1,193 @@
 """Data Management Module - SQLite database operations."""
 
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 import numpy as np
 from datetime import datetime
 import config
+from .gallery_index import GalleryIndex
+from .ivf_index import IVFIndex
+from .sharded_index import ShardedIndex
+from . import gallery_snapshot, gallery_archive
+from .metrics import metrics
+
+EMBEDDING_DTYPES = ("float64", "float32", "float16", "int8")
+ANGULAR_METRICS = ("cosine", "euclidean_l2")
+
+# Statements shared by several methods. sqlite3 caches prepared statements per connection
+# keyed by SQL text (cached_statements, see _open_connection), so values are always bound
+# as parameters and never formatted into the text
+INSERT_USER_SQL = (
+    "INSERT INTO users (user_id, name, embedding, created_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO NOTHING"
+)
+INSERT_CHANGE_SQL = "INSERT INTO changes (user_id, op) VALUES (?, ?)"
+SELECT_USER_SQL = "SELECT user_id, name, embedding, created_at FROM users WHERE user_id = ?"
+DELETE_USER_SQL = "DELETE FROM users WHERE user_id = ?"
+INSERT_TEMPLATE_SQL = "INSERT INTO templates (user_id, embedding, created_at) VALUES (?, ?, ?)"
+
+
+def encode_embedding(embedding: np.ndarray, dtype: str) -> bytes:
+    """
+    Serialize embedding to a BLOB in the given storage dtype.
+    int8 stores a float32 per-vector scale followed by the quantized values.
+    """
+    embedding = np.asarray(embedding, dtype=np.float64).ravel()
+    if dtype == "int8":
+        max_abs = np.max(np.abs(embedding)) if embedding.size else 0.0
+        scale = np.float32(max_abs / 127 if max_abs > 0 else 1.0)
+        quantized = np.clip(np.round(embedding / scale), -127, 127).astype(np.int8)
+        return scale.tobytes() + quantized.tobytes()
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    return embedding.astype(dtype).tobytes()
+
+
+def decode_embedding(blob: bytes, dtype: str) -> np.ndarray:
+    """Deserialize a BLOB written by encode_embedding. Returns float64 array."""
+    if dtype == "int8":
+        scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+        return np.frombuffer(blob, dtype=np.int8, offset=4).astype(np.float64) * float(scale)
+
+    return np.frombuffer(blob, dtype=dtype).astype(np.float64, copy=False)
+
+
+def aggregate_templates(templates: np.ndarray, metric: str = config.DISTANCE_METRIC) -> np.ndarray:
+    """
+    Per-user gallery embedding from a (T, D) template matrix: the mean template,
+    averaged over unit vectors for angular metrics so no template dominates by norm.
+    """
+    templates = np.atleast_2d(np.asarray(templates, dtype=np.float64))
+    if len(templates) == 1:
+        return templates[0].copy()
+    if metric in ANGULAR_METRICS:
+        norms = np.linalg.norm(templates, axis=1, keepdims=True)
+        templates = templates / np.where(norms > 0, norms, 1.0)
+
+    return templates.mean(axis=0)
 
 
 class DataManager:
-    """Handles user data and embedding storage in SQLite."""
+    """
+    Handles user data and embedding storage in SQLite.
+    Safe to share between threads: each thread gets its own connection to the
+    WAL-mode database, so readers never block on the writer.
+    """
 
-    def __init__(self, db_path: str = config.DATABASE_PATH):
+    def __init__(
+        self,
+        db_path: str = config.DATABASE_PATH,
+        search_mode: str = config.SEARCH_MODE,
+        ann_index_path: str = config.ANN_INDEX_PATH,
+        embedding_dtype: str = config.EMBEDDING_DTYPE,
+        snapshot_path: str | None = config.GALLERY_SNAPSHOT_PATH,
+    ):
+        if embedding_dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {embedding_dtype}")
         self.db_path = db_path
-        self.conn = None
+        self.embedding_dtype = embedding_dtype
+        self.embedding_dim = None
+        self.search_mode = search_mode
+        self.ann_index_path = ann_index_path
+        self.snapshot_path = snapshot_path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connected = False
+
+        # Resident gallery, kept in sync with the changes table
+        self.gallery = None
+        self.gallery_version = 0
+        self._gallery_lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection | None:
+        """The calling thread's connection, opened on first use after connect()."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None and self._connected:
+            conn = self._open_connection()
+
+        return conn
 
     def connect(self) -> None:
         """Open database connection and create tables if not exist."""
-        self.conn = sqlite3.connect(self.db_path)
+        self._connected = True
         self.create_tables()
 
     def close(self) -> None:
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close the connections of all threads."""
+        with self._gallery_lock:
+            if isinstance(self.gallery, IVFIndex):
+                self.gallery.version = self.gallery_version
+                self.gallery.save(self.ann_index_path)
+            elif isinstance(self.gallery, ShardedIndex):
+                self.gallery.close()
+            self.gallery = None
+            self.gallery_version = 0
+        self._connected = False
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open and tune a connection for the calling thread."""
+        # isolation_level=None: transactions are only those opened by transaction()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=config.SQLITE_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=config.SQLITE_CACHED_STATEMENTS,
+        )
+        conn.execute(f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA mmap_size = {int(config.SQLITE_MMAP_SIZE)}")
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = -{int(config.SQLITE_CACHE_SIZE_KB)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into one transaction (one commit/fsync for the whole batch):
+            with data_manager.transaction():
+                data_manager.add_user(...)
+                data_manager.delete_user(...)
+        Nested calls join the outer transaction. Rolls back if the block raises.
+        """
+        conn = self.conn
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            # IMMEDIATE takes the write lock up front, so checks inside the block stay valid
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.rollback()
+            raise
+        self._local.depth = depth
+        if depth == 0:
+            conn.commit()
 
     def create_tables(self) -> None:
-        """Create users table if not exists."""
+        """
+        Create users, templates, changes and meta tables if not exist.
+        Migrates stored embeddings in place if their dtype differs from embedding_dtype.
+        """
         cursor = self.conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -35,62 +197,680 @@ class DataManager:
                 created_at TEXT NOT NULL
             )
         """)
-        self.conn.commit()
+        # Append-only log of add/delete operations, used to sync resident galleries
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS changes (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                op TEXT NOT NULL
+            )
+        """)
+        # user_id is covered by the primary key index; name gets its own for prefix search
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)")
+        # All enrolled embeddings per user; users.embedding holds their aggregate,
+        # so the gallery stays one row per user however many templates there are
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS templates (
+                template_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_templates_user ON templates (user_id)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+
+        # Users enrolled before templates existed: their embedding is their only template.
+        # Every insert path writes a template since, so the scan runs once per database
+        with self.transaction():
+            if self._get_meta('templates_backfilled') is None:
+                cursor.execute("""
+                    INSERT INTO templates (user_id, embedding, created_at)
+                    SELECT user_id, embedding, created_at FROM users
+                    WHERE NOT EXISTS (SELECT 1 FROM templates WHERE templates.user_id = users.user_id)
+                """)
+                self._set_meta('templates_backfilled', '1')
+
+        self._migrate_embeddings()
 
     def add_user(self, user_id: str, name: str, embedding: np.ndarray) -> bool:
         """
         Add new user with embedding.
         Returns True if successful, False if user_id exists.
+        The existence check is the INSERT itself, so concurrent adds cannot both succeed.
         """
-        if self.user_exists(user_id):
-            return False
-        
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (user_id, name, embedding, created_at) VALUES (?, ?, ?, ?)",
-            (user_id, name, embedding.tobytes(), datetime.now().isoformat())
-        )
-        self.conn.commit()
+        embedding = np.asarray(embedding).ravel()
+        blob = encode_embedding(embedding, self.embedding_dtype)
+
+        created_at = datetime.now().isoformat()
+        with self.transaction() as conn:
+            self._check_dim(embedding)
+            cursor = conn.execute(INSERT_USER_SQL, (user_id, name, blob, created_at))
+            if cursor.rowcount == 0:
+                return False
+            conn.execute(INSERT_TEMPLATE_SQL, (user_id, blob, created_at))
+            conn.execute(INSERT_CHANGE_SQL, (user_id, 'add'))
         
         return True
 
+    def add_users(
+        self, users: list[tuple[str, str, np.ndarray]], chunk_size: int = 500
+    ) -> list[bool]:
+        """
+        Add many (user_id, name, embedding) records with executemany, one transaction per chunk.
+        Returns one bool per record: False if user_id already exists (or repeats in the input).
+        """
+        results = []
+        seen = set()
+
+        for start in range(0, len(users), chunk_size):
+            chunk = users[start:start + chunk_size]
+            created_at = datetime.now().isoformat()
+
+            # The write lock is held from the existence check to the commit
+            with self.transaction() as conn:
+                existing = self.existing_ids([user_id for user_id, _, _ in chunk])
+                rows = []
+                for user_id, name, embedding in chunk:
+                    if user_id in existing or user_id in seen:
+                        results.append(False)
+                        continue
+                    embedding = np.asarray(embedding).ravel()
+                    self._check_dim(embedding)
+                    seen.add(user_id)
+                    rows.append((user_id, name, encode_embedding(embedding, self.embedding_dtype), created_at))
+                    results.append(True)
+
+                if rows:
+                    conn.executemany(INSERT_USER_SQL, rows)
+                    conn.executemany(INSERT_TEMPLATE_SQL, [(row[0], row[2], row[3]) for row in rows])
+                    conn.executemany(INSERT_CHANGE_SQL, [(row[0], 'add') for row in rows])
+
+        return results
+
     def get_user(self, user_id: str) -> dict | None:
         """Get user by ID. Returns dict with user info or None."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT user_id, name, embedding, created_at FROM users WHERE user_id = ?",
-            (user_id,)
-        )
+        cursor.execute(SELECT_USER_SQL, (user_id,))
         row = cursor.fetchone()
         if row:
             return {
                 'user_id': row[0],
                 'name': row[1],
-                'embedding': np.frombuffer(row[2], dtype=np.float64),
+                'embedding': decode_embedding(row[2], self.embedding_dtype),
                 'created_at': row[3]
             }
         
         return None
 
+    def list_users(
+        self, limit: int = 100, after: str | None = None, prefix: str | None = None
+    ) -> list[dict]:
+        """
+        Page of users ordered by user_id, without embeddings.
+        Args:
+            limit: Page size
+            after: Last user_id of the previous page (keyset pagination), None for the first page
+            prefix: Only users whose user_id or name starts with prefix (case-sensitive)
+        Returns:
+            List of dicts with user_id, name, created_at.
+        """
+        conditions, params = [], []
+        if after is not None:
+            conditions.append("user_id > ?")
+            params.append(after)
+        if prefix:
+            # Range comparisons (unlike LIKE) can use the user_id and name indexes
+            upper = prefix + "\U0010ffff"
+            conditions.append("((user_id >= ? AND user_id < ?) OR (name >= ? AND name < ?))")
+            params.extend([prefix, upper, prefix, upper])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT user_id, name, created_at FROM users {where} ORDER BY user_id LIMIT ?",
+            (*params, limit)
+        )
+
+        return [{'user_id': row[0], 'name': row[1], 'created_at': row[2]} for row in cursor.fetchall()]
+
+    @metrics.timed("db_load")
     def get_all_embeddings(self) -> list[tuple[str, np.ndarray]]:
         """Get all (user_id, embedding) pairs for matching."""
         cursor = self.conn.cursor()
         cursor.execute("SELECT user_id, embedding FROM users")
         rows = cursor.fetchall()
         
-        return [(row[0], np.frombuffer(row[1], dtype=np.float64)) for row in rows]
+        return [(row[0], decode_embedding(row[1], self.embedding_dtype)) for row in rows]
 
     def delete_user(self, user_id: str) -> bool:
         """Delete user by ID. Returns True if deleted."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
-        self.conn.commit()
+        with self.transaction() as conn:
+            deleted = conn.execute(DELETE_USER_SQL, (user_id,)).rowcount > 0
+            if deleted:
+                conn.execute("DELETE FROM templates WHERE user_id = ?", (user_id,))
+                conn.execute(INSERT_CHANGE_SQL, (user_id, 'delete'))
         
-        return cursor.rowcount > 0
+        return deleted
+
+    def add_template(
+        self, user_id: str, embedding: np.ndarray, max_templates: int = config.MAX_TEMPLATES_PER_USER
+    ) -> bool:
+        """
+        Add another embedding for an existing user (new lighting, glasses, ageing)
+        and update the user's aggregate. Oldest templates beyond max_templates are pruned.
+        Returns False if the user does not exist.
+        """
+        embedding = np.asarray(embedding).ravel()
+        blob = encode_embedding(embedding, self.embedding_dtype)
+
+        with self.transaction() as conn:
+            if not self.user_exists(user_id):
+                return False
+            self._check_dim(embedding)
+            conn.execute(INSERT_TEMPLATE_SQL, (user_id, blob, datetime.now().isoformat()))
+            self._prune_oldest(user_id, max_templates)
+            self._update_aggregate(user_id)
+
+        return True
+
+    def get_templates(self, user_ids: list[str], chunk_size: int = 500) -> dict[str, np.ndarray]:
+        """(T, D) template matrix per user_id; users without templates are left out."""
+        cursor = self.conn.cursor()
+        templates: dict[str, list[np.ndarray]] = {}
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT user_id, embedding FROM templates WHERE user_id IN ({placeholders}) ORDER BY template_id",
+                chunk
+            )
+            for user_id, blob in cursor.fetchall():
+                templates.setdefault(user_id, []).append(decode_embedding(blob, self.embedding_dtype))
+
+        return {user_id: np.array(rows) for user_id, rows in templates.items()}
+
+    def get_user_templates(self, user_id: str) -> np.ndarray | None:
+        """
+        (T, D) templates of one user for a 1:1 claim check, through the user_id index,
+        so the cost does not grow with the gallery. Falls back to the stored embedding
+        as a (1, D) matrix. Returns None if the user does not exist.
+        """
+        templates = self.get_templates([user_id]).get(user_id)
+        if templates is not None:
+            return templates
+
+        user = self.get_user(user_id)
+
+        return user['embedding'][None, :] if user else None
+
+    def list_templates(self, user_id: str) -> list[dict]:
+        """
+        Templates of one user, oldest first, without embeddings.
+        Returns list of dicts with template_id (for remove_template) and created_at.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT template_id, created_at FROM templates WHERE user_id = ? ORDER BY template_id",
+            (user_id,)
+        )
+
+        return [{'template_id': row[0], 'created_at': row[1]} for row in cursor.fetchall()]
+
+    def remove_template(self, template_id: int) -> bool:
+        """
+        Remove one template by ID (see list_templates) and update the user's aggregate.
+        A user's last template is never removed (delete the user instead).
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT user_id FROM templates WHERE template_id = ?", (template_id,)).fetchone()
+            if row is None or self._template_count(row[0]) <= 1:
+                return False
+            conn.execute("DELETE FROM templates WHERE template_id = ?", (template_id,))
+            self._update_aggregate(row[0])
+
+        return True
+
+    def prune_templates(self, user_id: str, keep: int = config.MAX_TEMPLATES_PER_USER) -> int:
+        """Drop all but the newest keep (at least 1) templates. Returns number removed."""
+        with self.transaction():
+            removed = self._prune_oldest(user_id, keep)
+            if removed:
+                self._update_aggregate(user_id)
+
+        return removed
+
+    def _template_count(self, user_id: str) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM templates WHERE user_id = ?", (user_id,))
+
+        return cursor.fetchone()[0]
+
+    def _prune_oldest(self, user_id: str, keep: int) -> int:
+        """Delete templates older than the newest keep. Call inside transaction()."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            DELETE FROM templates WHERE user_id = ? AND template_id NOT IN (
+                SELECT template_id FROM templates WHERE user_id = ? ORDER BY template_id DESC LIMIT ?
+            )
+            """,
+            (user_id, user_id, max(keep, 1))
+        )
+
+        return cursor.rowcount
+
+    def _update_aggregate(self, user_id: str) -> None:
+        """Recompute users.embedding from the user's templates and log the change. Call inside transaction()."""
+        templates = self.get_templates([user_id]).get(user_id)
+        if templates is None:
+            return
+        blob = encode_embedding(aggregate_templates(templates), self.embedding_dtype)
+        self.conn.execute("UPDATE users SET embedding = ? WHERE user_id = ?", (blob, user_id))
+        self.conn.execute(INSERT_CHANGE_SQL, (user_id, 'add'))
 
     def user_exists(self, user_id: str) -> bool:
         """Check if user_id already exists."""
         cursor = self.conn.cursor()
         cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
         
-        return cursor.fetchone() is not None
\ No newline at end of file
+        return cursor.fetchone() is not None
+
+    def existing_ids(self, user_ids: list[str], chunk_size: int = 500) -> set[str]:
+        """Subset of user_ids already stored."""
+        cursor = self.conn.cursor()
+        existing = set()
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"SELECT user_id FROM users WHERE user_id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+
+        return existing
+
+    def _check_dim(self, embedding: np.ndarray) -> None:
+        """
+        Record dimension on first insert, reject mismatching embeddings afterwards.
+        Call inside transaction(), so the dimension recorded by another connection is seen.
+        """
+        if self._stored_dim() is None:
+            self._set_meta('embedding_dim', str(embedding.shape[0]))
+            self.embedding_dim = embedding.shape[0]
+        elif embedding.shape[0] != self.embedding_dim:
+            raise ValueError(f"Embedding dimension {embedding.shape[0]} != stored dimension {self.embedding_dim}")
+
+    def _stored_dim(self) -> int | None:
+        """Recorded embedding dimension, re-read while unknown (another process may have set it)."""
+        if self.embedding_dim is None:
+            dim = self._get_meta('embedding_dim')
+            self.embedding_dim = int(dim) if dim else None
+        return self.embedding_dim
+
+    def _get_meta(self, key: str) -> str | None:
+        """Get schema metadata value or None."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        row = cursor.fetchone()
+
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        """Set schema metadata value (committed with the caller's transaction)."""
+        cursor = self.conn.cursor()
+        cursor.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _migrate_embeddings(self, chunk_size: int = 1000) -> None:
+        """Re-encode stored embeddings if the recorded dtype differs from the configured one."""
+        with self.transaction():
+            migrated = self._reencode_embeddings(chunk_size)
+
+        if migrated:
+            # Reclaim the space freed by smaller BLOBs
+            self.conn.execute("VACUUM")
+
+    def _reencode_embeddings(self, chunk_size: int) -> bool:
+        """Body of _migrate_embeddings, run in its transaction. Returns True if rows were re-encoded."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT embedding FROM users LIMIT 1")
+        first = cursor.fetchone()
+
+        # Databases created before dtype was recorded hold raw float64 BLOBs
+        stored_dtype = self._get_meta('embedding_dtype') or ("float64" if first else self.embedding_dtype)
+        dim = self._get_meta('embedding_dim')
+        if dim is None and first:
+            dim = str(decode_embedding(first[0], stored_dtype).shape[0])
+            self._set_meta('embedding_dim', dim)
+        self.embedding_dim = int(dim) if dim else None
+
+        if stored_dtype != self.embedding_dtype and first:
+            for table in ("users", "templates"):
+                last_rowid = 0
+                while True:
+                    # Keyset pages, so no SELECT is pending while rows are updated
+                    cursor.execute(
+                        f"SELECT rowid, embedding FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                        (last_rowid, chunk_size)
+                    )
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    last_rowid = rows[-1][0]
+                    cursor.executemany(
+                        f"UPDATE {table} SET embedding = ? WHERE rowid = ?",
+                        [
+                            (encode_embedding(decode_embedding(blob, stored_dtype), self.embedding_dtype), rowid)
+                            for rowid, blob in rows
+                        ]
+                    )
+            # Resident galleries in other processes must reload the re-encoded values
+            cursor.execute("INSERT INTO changes (user_id, op) SELECT user_id, 'add' FROM users")
+        
+        self._set_meta('embedding_dtype', self.embedding_dtype)
+
+        return bool(stored_dtype != self.embedding_dtype and first)
+
+    @metrics.timed("gallery")
+    def get_gallery(self) -> GalleryIndex | IVFIndex:
+        """
+        Get the resident gallery index, applying only changes since the last call.
+        Picks up writes from other processes sharing the same database file.
+        """
+        with self._gallery_lock:
+            if self.gallery is None:
+                self._load_gallery()
+            else:
+                self.sync()
+            metrics.set_gauge("gallery_size", len(self.gallery))
+
+            return self.gallery
+
+    def sync(self) -> int:
+        """Apply logged changes newer than gallery_version. Returns number applied."""
+        with self._gallery_lock:
+            return self._sync()
+
+    def _sync(self) -> int:
+        if self.gallery is None:
+            return 0
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT version, user_id, op FROM changes WHERE version > ? ORDER BY version",
+            (self.gallery_version,)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+
+        # Only the last operation per user matters
+        last_op = {user_id: op for _, user_id, op in rows}
+        added = [user_id for user_id, op in last_op.items() if op == 'add']
+        for user_id, op in last_op.items():
+            if op == 'delete':
+                self.gallery.remove(user_id)
+
+        if added:
+            fetched = dict(self._fetch_embeddings(added))
+            for user_id in added:
+                if user_id in fetched:
+                    self.gallery.add(user_id, fetched[user_id])
+                else:
+                    # Deleted again after the change log was read
+                    self.gallery.remove(user_id)
+            if isinstance(self.gallery, IVFIndex) and self.gallery.needs_retrain():
+                self.gallery.retrain()
+
+        self.gallery_version = rows[-1][0]
+
+        return len(rows)
+
+    def export_snapshot(self, path: str | None = None, chunk_size: int = 1000) -> dict:
+        """
+        Write the gallery to a flat memory-mappable snapshot file.
+        Returns the snapshot header (version, count, dim, ...).
+        """
+        path = path or self.snapshot_path
+        cursor = self.conn.cursor()
+
+        # One read transaction, so version, count and rows are consistent
+        started = not self.conn.in_transaction
+        if started:
+            cursor.execute("BEGIN")
+        try:
+            version = self.current_version()
+            cursor.execute("SELECT COUNT(*), MAX(LENGTH(user_id)) FROM users")
+            count, id_width = cursor.fetchone()
+            gallery_snapshot.write_snapshot(
+                path,
+                self._iter_embedding_chunks(chunk_size),
+                count,
+                self._stored_dim() or 0,
+                id_width or 1,
+                version,
+                sorted_ids=True,
+            )
+        finally:
+            if started:
+                self.conn.commit()
+
+        return gallery_snapshot.read_header(path)
+
+    def _iter_embedding_chunks(self, chunk_size: int = 1000):
+        """Yield (user_ids, (n, D) float64 matrix) pages in user_id order."""
+        cursor = self.conn.cursor()
+        # Sorted ids let the memory-mapped index find users by binary search
+        cursor.execute("SELECT user_id, embedding FROM users ORDER BY user_id")
+        while rows := cursor.fetchmany(chunk_size):
+            yield (
+                [row[0] for row in rows],
+                np.array([decode_embedding(row[1], self.embedding_dtype) for row in rows]),
+            )
+
+    def export_gallery(self, path: str, chunk_size: int = 1000, dtype: str = "float32") -> dict:
+        """
+        Stream users and their templates to a chunked .npz archive (see gallery_archive),
+        chunk_size users at a time, so memory does not grow with the gallery.
+        Embeddings are written as dtype (float32 or float64). Returns the archive meta.
+        """
+        cursor = self.conn.cursor()
+
+        # One read transaction, so users and templates are from the same state
+        started = not self.conn.in_transaction
+        if started:
+            cursor.execute("BEGIN")
+        try:
+            return gallery_archive.write_archive(
+                path,
+                self._iter_archive_chunks(chunk_size, np.dtype(dtype)),
+                {'dim': self._stored_dim() or 0, 'dtype': dtype, 'metric': config.DISTANCE_METRIC},
+            )
+        finally:
+            if started:
+                self.conn.commit()
+
+    def _iter_archive_chunks(self, chunk_size: int, dtype: np.dtype):
+        """Yield gallery_archive column dicts for chunk_size users at a time."""
+        dim = self._stored_dim() or 0
+        users = self.conn.cursor()
+        users.execute("SELECT user_id, name, created_at, embedding FROM users ORDER BY rowid")
+        templates = self.conn.cursor()
+        while rows := users.fetchmany(chunk_size):
+            user_ids = [row[0] for row in rows]
+            placeholders = ",".join("?" * len(user_ids))
+            templates.execute(
+                f"SELECT user_id, created_at, embedding FROM templates "
+                f"WHERE user_id IN ({placeholders}) ORDER BY template_id",
+                user_ids
+            )
+            template_rows = templates.fetchall()
+            yield {
+                'user_ids': np.array(user_ids, dtype=str),
+                'names': np.array([row[1] for row in rows], dtype=str),
+                'created_at': np.array([row[2] for row in rows], dtype=str),
+                'embeddings': np.array(
+                    [decode_embedding(row[3], self.embedding_dtype) for row in rows], dtype=dtype
+                ).reshape(len(rows), dim),
+                'template_user_ids': np.array([row[0] for row in template_rows], dtype=str),
+                'template_created_at': np.array([row[1] for row in template_rows], dtype=str),
+                'templates': np.array(
+                    [decode_embedding(row[2], self.embedding_dtype) for row in template_rows], dtype=dtype
+                ).reshape(len(template_rows), dim),
+            }
+
+    def import_gallery(self, path: str) -> dict:
+        """
+        Bulk-load a gallery archive, one transaction per archive chunk.
+        Users whose user_id already exists are skipped (with their templates).
+        Users without templates in the archive get their embedding as the only template.
+        Returns {'imported', 'skipped'}.
+        """
+        meta = gallery_archive.read_meta(path)
+        if meta['count'] and self._stored_dim() is not None and meta['dim'] != self.embedding_dim:
+            raise ValueError(
+                f"Archive embedding dimension {meta['dim']} does not match stored dimension {self.embedding_dim}"
+            )
+
+        summary = {'imported': 0, 'skipped': 0}
+        for chunk in gallery_archive.iter_archive(path):
+            user_ids = [str(user_id) for user_id in chunk['user_ids']]
+            templates: dict[str, list[int]] = {}
+            for row, user_id in enumerate(chunk['template_user_ids']):
+                templates.setdefault(str(user_id), []).append(row)
+
+            # The write lock is held from the existence check to the commit
+            with self.transaction() as conn:
+                existing = self.existing_ids(user_ids)
+                user_rows, template_rows = [], []
+                for row, user_id in enumerate(user_ids):
+                    if user_id in existing:
+                        summary['skipped'] += 1
+                        continue
+                    existing.add(user_id)
+                    embedding = chunk['embeddings'][row].astype(np.float64)
+                    self._check_dim(embedding)
+                    created_at = str(chunk['created_at'][row])
+                    rows = templates.get(user_id)
+                    if rows:
+                        # Re-aggregate, since the archive may come from a node with another metric
+                        embedding = aggregate_templates(chunk['templates'][rows].astype(np.float64))
+                        template_rows += [
+                            (
+                                user_id,
+                                encode_embedding(chunk['templates'][i].astype(np.float64), self.embedding_dtype),
+                                str(chunk['template_created_at'][i]),
+                            )
+                            for i in rows
+                        ]
+                    blob = encode_embedding(embedding, self.embedding_dtype)
+                    if not rows:
+                        template_rows.append((user_id, blob, created_at))
+                    user_rows.append((user_id, str(chunk['names'][row]), blob, created_at))
+
+                if user_rows:
+                    conn.executemany(INSERT_USER_SQL, user_rows)
+                    conn.executemany(INSERT_TEMPLATE_SQL, template_rows)
+                    conn.executemany(INSERT_CHANGE_SQL, [(row[0], 'add') for row in user_rows])
+                    summary['imported'] += len(user_rows)
+
+        return summary
+
+    def current_version(self) -> int:
+        """Latest version in the changes table."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT MAX(version) FROM changes")
+        
+        return cursor.fetchone()[0] or 0
+
+    def _fetch_embeddings(
+        self, user_ids: list[str], chunk_size: int = 500
+    ) -> list[tuple[str, np.ndarray]]:
+        """Get (user_id, embedding) pairs for the given IDs."""
+        cursor = self.conn.cursor()
+        result = []
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT user_id, embedding FROM users WHERE user_id IN ({placeholders})",
+                chunk
+            )
+            result.extend((row[0], decode_embedding(row[1], self.embedding_dtype)) for row in cursor.fetchall())
+
+        return result
+
+    def _load_gallery(self) -> None:
+        """Build the resident gallery from the database, the snapshot file or the saved IVF index."""
+        # Read the version first: changes committed meanwhile are re-applied idempotently
+        version = self.current_version()
+        if self.search_mode == "ivf":
+            self.gallery, version = self._load_ann_index(version)
+        elif self.snapshot_path:
+            self.gallery, version = self._load_snapshot(version)
+        else:
+            self.gallery = GalleryIndex.from_embeddings(self.get_all_embeddings())
+        if self.search_mode == "sharded":
+            self.gallery = ShardedIndex.from_index(self.gallery)
+        self.gallery_version = version
+        # Rows changed while the gallery file was on disk (or since version was read)
+        self._sync()
+
+    def _load_snapshot(self, version: int) -> tuple[GalleryIndex, int]:
+        """
+        Memory-map the gallery snapshot, rebuilding it first if it is stale.
+        Returns (index, version the snapshot was taken at).
+        """
+        header = gallery_snapshot.read_header(self.snapshot_path)
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users")
+        count = cursor.fetchone()[0]
+
+        stale = (
+            header is None
+            or header['version'] != version
+            or header['count'] != count
+            or (count and header['dim'] != self._stored_dim())
+        )
+        if stale:
+            header = self.export_snapshot()
+
+        return gallery_snapshot.load_snapshot(self.snapshot_path, header), header['version']
+
+    def _load_ann_index(self, version: int) -> tuple[IVFIndex, int]:
+        """
+        Load the persisted IVF index and bring its user set in line with the database.
+        Returns (index, version its embeddings are current to); the caller replays newer
+        changes, so users updated while the file was on disk are refreshed too.
+        """
+        index = None
+        if os.path.exists(self.ann_index_path):
+            try:
+                index = IVFIndex.load(self.ann_index_path)
+            except Exception:
+                index = None
+        # A file newer than the change log belongs to another database
+        if index is None or index.distance_metric != config.DISTANCE_METRIC or index.version > version:
+            index = IVFIndex(config.DISTANCE_METRIC, config.IVF_NLIST, config.IVF_NPROBE)
+            index.version = version
+        index.nprobe = config.IVF_NPROBE
+
+        # Apply only the difference between the saved index and the database
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT user_id FROM users")
+        db_ids = {row[0] for row in cursor.fetchall()}
+        for user_id in set(index.ids) - db_ids:
+            index.remove(user_id)
+
+        missing = [user_id for user_id in db_ids if user_id not in index]
+        if missing:
+            stored = self._fetch_embeddings(missing)
+            index.add_batch([user_id for user_id, _ in stored], np.array([emb for _, emb in stored]))
+            if index.needs_retrain():
+                index.retrain()
+
+        return index, index.version
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""Embedding Cache Module - Content-addressed cache of embeddings for repeated face crops."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+import config
+
+CACHE_MODES = ("exact", "phash")
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """64-bit DCT hash: near-identical images differ in only a few bits."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray.astype(np.float32), (32, 32), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # Skip the DC term so overall brightness does not dominate the median
+    bits = low > np.median(low[1:])
+
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class EmbeddingCache:
+    """
+    Bounded in-memory cache of embeddings keyed by image content and model.
+    exact mode keys on a hash of the pixels; phash mode also returns the embedding of
+    any cached image whose perceptual hash is within max_distance bits.
+    With disk_dir set, entries are also written as .npy files and survive restarts.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = config.EMBEDDING_CACHE_SIZE,
+        mode: str = config.EMBEDDING_CACHE_MODE,
+        eviction: str = config.EMBEDDING_CACHE_EVICTION,
+        max_distance: int = config.EMBEDDING_CACHE_PHASH_DISTANCE,
+        disk_dir: str | None = config.EMBEDDING_CACHE_DIR,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported cache mode: {mode}")
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unsupported eviction policy: {eviction}")
+
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.mode = mode
+        self.eviction = eviction
+        self.max_distance = max_distance
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.near_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._hashes: dict[str, tuple[str, int]] = {}
+        self._lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, image: np.ndarray, variant: str = "") -> tuple[str, int | None]:
+        """
+        Cache key for image (and its perceptual hash in phash mode).
+        variant separates entries for the same pixels that embed differently,
+        e.g. full frames vs. already detected crops.
+        """
+        prefix = f"{self.namespace}/{variant}"
+        if self.mode == "phash":
+            phash = perceptual_hash(image)
+            return f"{prefix}:{phash:016x}", phash
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(prefix.encode())
+        digest.update(f"{image.shape}{image.dtype}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest(), None
+
+    def get(self, image: np.ndarray, variant: str = "") -> np.ndarray | None:
+        """Cached embedding for image (a copy), or None."""
+        key, phash = self.key(image, variant)
+
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self.hits += 1
+                self._touch(key)
+                return embedding.copy()
+
+            if phash is not None:
+                near = self._nearest(variant, phash)
+                if near is not None:
+                    self.near_hits += 1
+                    self._touch(near)
+                    return self._entries[near].copy()
+
+        embedding = self._read_disk(key)
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, variant, phash, embedding)
+
+        return embedding.copy()
+
+    def put(self, image: np.ndarray, embedding: np.ndarray, variant: str = "") -> None:
+        """Cache embedding for image, evicting the oldest entry when full."""
+        if self.max_entries <= 0:
+            return
+        key, phash = self.key(image, variant)
+        embedding = np.array(embedding, dtype=np.float64)
+
+        with self._lock:
+            self._store(key, variant, phash, embedding)
+        self._write_disk(key, embedding)
+
+    def clear(self) -> None:
+        """Drop the in-memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._hashes.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.disk_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (lookups - self.misses) / lookups if lookups else 0.0,
+            }
+
+    def _touch(self, key: str) -> None:
+        """Mark key as recently used (LRU only; FIFO keeps insertion order)."""
+        if self.eviction == "lru":
+            self._entries.move_to_end(key)
+
+    def _store(self, key: str, variant: str, phash: int | None, embedding: np.ndarray) -> None:
+        if key in self._entries:
+            self._entries[key] = embedding
+            self._touch(key)
+            return
+
+        while len(self._entries) >= self.max_entries > 0:
+            old_key, _ = self._entries.popitem(last=False)
+            self._hashes.pop(old_key, None)
+            self.evictions += 1
+
+        self._entries[key] = embedding
+        if phash is not None:
+            self._hashes[key] = (variant, phash)
+
+    def _nearest(self, variant: str, phash: int) -> str | None:
+        """Cached key with the closest perceptual hash within max_distance bits."""
+        best_key, best_distance = None, self.max_distance + 1
+        for key, (other_variant, other) in self._hashes.items():
+            if other_variant != variant:
+                continue
+            distance = (phash ^ other).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+
+        return best_key
+
+    def _disk_path(self, key: str) -> str:
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.disk_dir, f"{name}.npy")
+
+    def _read_disk(self, key: str) -> np.ndarray | None:
+        if not self.disk_dir:
+            return None
+        try:
+            return np.load(self._disk_path(key))
+        except Exception:
+            return None
+
+    def _write_disk(self, key: str, embedding: np.ndarray) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, embedding)
+            os.replace(tmp_path, path)
+        except Exception:
+            pass
@@ -4,6 +4,7 @@ import cv2
 import numpy as np
 from deepface import DeepFace
 import config
+from .metrics import metrics
 
 
 class FaceDetector:
@@ -27,34 +28,74 @@ class FaceDetector:
             self.cap.release()
             self.cap = None
 
+    @metrics.timed("get_frame")
     def get_frame(self) -> np.ndarray | None:
         """Capture a single frame from camera. Returns frame or None."""
         if not self.cap:
             return None
         ret, frame = self.cap.read()
+        if not ret:
+            metrics.increment("failures", stage="get_frame")
         
         return frame if ret else None
 
     def detect_face(self, frame: np.ndarray) -> dict | None:
         """
         Detect face in frame using DeepFace.
-        Returns dict with 'face' (cropped), 'region' (x,y,w,h) or None.
+        Returns dict with 'face' (cropped), 'crop' (aligned BGR uint8 crop, ready for
+        embedding with detection skipped), 'region' (x,y,w,h) or None.
+        """
+        faces = self.detect_faces(frame)
+        
+        return faces[0] if faces else None
+
+    @metrics.timed("detect")
+    def detect_faces(self, frame: np.ndarray) -> list[dict]:
+        """
+        Detect all faces in frame using DeepFace.
+        Returns list of dicts shaped like detect_face(), empty if none found.
+        """
+        faces = self.run_detector(frame)
+        if faces is None:
+            return []
+
+        detected = [
+            {
+                'face': face['face'],
+                'crop': self.face_to_bgr(face['face']),
+                'region': face['facial_area']
+            }
+            for face in faces
+        ]
+        metrics.increment("detections", len(detected))
+
+        return detected
+
+    def run_detector(self, image: np.ndarray) -> list[dict] | None:
+        """
+        Raw DeepFace.extract_faces results with confidence > 0 for image.
+        Returns None (and counts a detect failure) if the detector raised.
         """
         try:
             faces = DeepFace.extract_faces(
-                frame, 
+                image, 
                 detector_backend=config.DETECTOR_BACKEND,
                 enforce_detection=False
             )
-            if faces and faces[0]['confidence'] > 0:
-                return {
-                    'face': faces[0]['face'],
-                    'region': faces[0]['facial_area']
-                }
         except Exception:
-            pass
-        
-        return None
+            metrics.increment("failures", stage="detect")
+            return None
+
+        return [face for face in faces if face['confidence'] > 0]
+
+    @staticmethod
+    def face_to_bgr(face: np.ndarray) -> np.ndarray:
+        """Convert DeepFace's RGB float [0, 1] face to the BGR uint8 layout models expect."""
+        face = np.squeeze(face)
+        if face.dtype != np.uint8:
+            face = np.clip(face * 255, 0, 255).astype(np.uint8)
+
+        return np.ascontiguousarray(face[:, :, ::-1])
 
     def draw_bbox(self, frame: np.ndarray, region: dict, label: str = "") -> np.ndarray:
         """Draw bounding box and label on frame. Returns annotated frame."""
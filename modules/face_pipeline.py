@@ -0,0 +1,88 @@
+"""Face Pipeline Module - Single-pass detection and embedding."""
+
+import time
+import numpy as np
+from .face_detection import FaceDetector
+from .face_recognition import FaceRecognizer
+from .gallery_index import GalleryIndex
+from .ivf_index import IVFIndex
+
+
+class FacePipeline:
+    """
+    Detects a face once and embeds the detected crop directly,
+    instead of letting DeepFace.represent run detection a second time.
+    """
+
+    def __init__(self, detector: FaceDetector, recognizer: FaceRecognizer):
+        self.detector = detector
+        self.recognizer = recognizer
+
+    def process(self, frame: np.ndarray, timings: dict | None = None) -> dict | None:
+        """
+        Detect face in frame and extract its embedding.
+        If timings is given, 'detect' and 'embed' stage durations (ms) are stored in it.
+        Returns detect_face() dict plus 'embedding' (None if extraction failed),
+        or None if no face was detected.
+        """
+        start_time = time.perf_counter()
+        face_data = self.detector.detect_face(frame)
+        if timings is not None:
+            timings['detect'] = (time.perf_counter() - start_time) * 1000
+        if face_data is None:
+            return None
+
+        start_time = time.perf_counter()
+        face_data['embedding'] = self.recognizer.extract_embedding(face_data['crop'], skip_detection=True)
+        if timings is not None:
+            timings['embed'] = (time.perf_counter() - start_time) * 1000
+
+        return face_data
+
+    def process_all(self, frame: np.ndarray, timings: dict | None = None) -> list[dict]:
+        """
+        Detect every face in frame and embed all crops in one batched call.
+        Returns list of detect_faces() dicts plus 'embedding' (None if extraction failed).
+        """
+        start_time = time.perf_counter()
+        faces = self.detector.detect_faces(frame)
+        if timings is not None:
+            timings['detect'] = (time.perf_counter() - start_time) * 1000
+        if not faces:
+            return []
+
+        start_time = time.perf_counter()
+        embeddings = self.recognizer.extract_embeddings([face['crop'] for face in faces], skip_detection=True)
+        for face, embedding in zip(faces, embeddings):
+            face['embedding'] = embedding
+        if timings is not None:
+            timings['embed'] = (time.perf_counter() - start_time) * 1000
+
+        return faces
+
+    def identify_all(
+        self,
+        faces: list[dict],
+        gallery: GalleryIndex | IVFIndex,
+        timings: dict | None = None,
+        templates=None,
+    ) -> list[dict]:
+        """
+        Match all embedded faces against the gallery together.
+        templates (e.g. DataManager.get_templates) re-scores the nearest users by their templates.
+        Sets 'match' on each face to (user_id, distance) or None. Returns faces.
+        """
+        start_time = time.perf_counter()
+        for face in faces:
+            face['match'] = None
+
+        embedded = [face for face in faces if face.get('embedding') is not None]
+        if embedded and len(gallery):
+            queries = np.array([face['embedding'] for face in embedded])
+            found = self.recognizer.find_matches(queries, gallery, k=1, templates=templates)
+            for face, matches in zip(embedded, found):
+                face['match'] = matches[0] if matches else None
+        if timings is not None:
+            timings['match'] = (time.perf_counter() - start_time) * 1000
+
+        return faces
\ No newline at end of file
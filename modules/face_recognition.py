@@ -3,6 +3,10 @@
 import numpy as np
 from deepface import DeepFace
 import config
+from .gallery_index import GalleryIndex
+from .ivf_index import IVFIndex
+from .embedding_cache import EmbeddingCache
+from .metrics import metrics
 
 
 class FaceRecognizer:
@@ -13,29 +17,117 @@ class FaceRecognizer:
         model_name: str = config.RECOGNITION_MODEL,
         distance_metric: str = config.DISTANCE_METRIC,
         threshold: float = config.RECOGNITION_THRESHOLD,
+        cache: EmbeddingCache | None = None,
     ):
         self.model_name = model_name
         self.distance_metric = distance_metric
         self.threshold = threshold
+        if cache is None and config.EMBEDDING_CACHE_SIZE > 0:
+            cache = EmbeddingCache(model_name)
+        self.cache = cache
 
-    def extract_embedding(self, face_img: np.ndarray) -> np.ndarray | None:
+    @metrics.timed("embed")
+    def extract_embedding(
+        self, face_img: np.ndarray, skip_detection: bool = False
+    ) -> np.ndarray | None:
         """
         Extract embedding vector from face image.
+        Set skip_detection when face_img is already a detected face crop
+        (FaceDetector.detect_face()['crop']) so DeepFace does not detect again.
         Returns 1D numpy array or None if failed.
         """
+        cacheable = self._cacheable(face_img)
+        if cacheable:
+            cached = self.cache.get(face_img, self._cache_variant(skip_detection))
+            if cached is not None:
+                return cached
+
+        embedding = self._represent(face_img, skip_detection)
+        if embedding is not None and cacheable:
+            self.cache.put(face_img, embedding, self._cache_variant(skip_detection))
+
+        return embedding
+
+    def _represent(self, face_img: np.ndarray, skip_detection: bool) -> np.ndarray | None:
+        """One uncached model call for a single image. Returns 1D array or None if failed."""
         try:
             result = DeepFace.represent(
                 img_path=face_img,
                 model_name=self.model_name,
-                enforce_detection=False
+                enforce_detection=False,
+                **self._detector_args(skip_detection)
             )
             if result:
                 return np.array(result[0]['embedding'], dtype=np.float64)
         except Exception:
-            pass
+            metrics.increment("failures", stage="embed")
         
         return None
 
+    @metrics.timed("embed_batch")
+    def extract_embeddings(
+        self, face_imgs: list[np.ndarray], skip_detection: bool = False
+    ) -> list[np.ndarray | None]:
+        """
+        Extract embeddings for many images in one batched model call.
+        Falls back to one call per image if the installed DeepFace has no batch support.
+        Returns one 1D array (or None if failed) per image.
+        """
+        if not face_imgs:
+            return []
+
+        # Serve cached crops and only send the rest to the model
+        embeddings: list[np.ndarray | None] = [None] * len(face_imgs)
+        variant = self._cache_variant(skip_detection)
+        missing = []
+        for i, face_img in enumerate(face_imgs):
+            if self._cacheable(face_img):
+                embeddings[i] = self.cache.get(face_img, variant)
+            if embeddings[i] is None:
+                missing.append(i)
+        if not missing:
+            return embeddings
+
+        try:
+            results = DeepFace.represent(
+                img_path=[face_imgs[i] for i in missing],
+                model_name=self.model_name,
+                enforce_detection=False,
+                **self._detector_args(skip_detection)
+            )
+            # Batched calls return one list of faces per input image
+            if len(results) == len(missing) and all(isinstance(r, list) for r in results):
+                for i, r in zip(missing, results):
+                    if r:
+                        embeddings[i] = np.array(r[0]['embedding'], dtype=np.float64)
+                        if self._cacheable(face_imgs[i]):
+                            self.cache.put(face_imgs[i], embeddings[i], variant)
+                return embeddings
+        except Exception:
+            metrics.increment("failures", stage="embed_batch")
+
+        # The cache was already checked for these; go straight to the model
+        for i in missing:
+            embeddings[i] = self._represent(face_imgs[i], skip_detection)
+            if embeddings[i] is not None and self._cacheable(face_imgs[i]):
+                self.cache.put(face_imgs[i], embeddings[i], variant)
+
+        return embeddings
+
+    def _cacheable(self, face_img) -> bool:
+        """Only in-memory images are cached (not file paths)."""
+        return self.cache is not None and isinstance(face_img, np.ndarray)
+
+    @staticmethod
+    def _cache_variant(skip_detection: bool) -> str:
+        """Full frames and detected crops embed differently, so they are cached apart."""
+        return "crop" if skip_detection else f"frame-{config.DETECTOR_BACKEND}"
+
+    @staticmethod
+    def _detector_args(skip_detection: bool) -> dict:
+        """DeepFace.represent arguments for full frames vs. already detected crops."""
+        return {'detector_backend': "skip"} if skip_detection else {}
+
     def calculate_distance(
         self, embedding1: np.ndarray, embedding2: np.ndarray
     ) -> float:
@@ -55,27 +147,164 @@ class FaceRecognizer:
         
         return float('inf')
 
+    @metrics.timed("match")
     def find_match(
-        self, embedding: np.ndarray, stored_embeddings: list[tuple[str, np.ndarray]]
+        self,
+        embedding: np.ndarray,
+        stored_embeddings: list[tuple[str, np.ndarray]] | GalleryIndex | IVFIndex,
+        templates=None,
     ) -> tuple[str, float] | None:
         """
         Find best match from stored embeddings.
         Args:
             embedding: Query embedding
-            stored_embeddings: List of (user_id, embedding) tuples
+            stored_embeddings: List of (user_id, embedding) tuples, a GalleryIndex
+                or an IVFIndex (approximate search)
+            templates: Optional template lookup for reranking, see find_matches
         Returns:
             (user_id, distance) if match found below threshold, else None.
         """
-        best_match = None
-        best_distance = float('inf')
+        if templates is not None:
+            matches = self.find_matches(np.atleast_2d(embedding), stored_embeddings, k=1, templates=templates)[0]
+            return matches[0] if matches else None
 
-        for user_id, stored_emb in stored_embeddings:
-            distance = self.calculate_distance(embedding, stored_emb)
-            if distance < best_distance:
-                best_distance = distance
-                best_match = user_id
+        if isinstance(stored_embeddings, (GalleryIndex, IVFIndex)):
+            index = stored_embeddings
+        else:
+            index = GalleryIndex.from_embeddings(stored_embeddings)
+
+        # Exact indexes report the winning row, so no user_id -> row map is needed
+        if isinstance(index, IVFIndex):
+            found = index.search(embedding, self.distance_metric)
+            best = (found[0], index.get(found[0])) if found else None
+        else:
+            found = index.nearest(embedding, self.distance_metric)
+            best = (index.id_of(found[0]), index.embedding(found[0])) if found else None
+        if best is None:
+            metrics.increment("rejects")
+            return None
+
+        # Recompute the winner with the scalar formula so distances match exactly
+        best_match, stored = best
+        best_distance = self.calculate_distance(embedding, stored)
 
         if best_distance < self.threshold:
+            metrics.increment("matches")
             return (best_match, best_distance)
         
-        return None
\ No newline at end of file
+        metrics.increment("rejects")
+        return None
+
+    @metrics.timed("match_batch")
+    def find_matches(
+        self,
+        embeddings: np.ndarray,
+        stored_embeddings: list[tuple[str, np.ndarray]] | GalleryIndex | IVFIndex,
+        k: int = 1,
+        block_size: int = 1024,
+        templates=None,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Find top-k matches for many query embeddings at once.
+        Args:
+            embeddings: (M, D) query matrix
+            stored_embeddings: List of (user_id, embedding) tuples, a GalleryIndex
+                or an IVFIndex (approximate, searched query by query)
+            k: Number of candidates per query
+            block_size: Block size for the matrix-matrix products
+            templates: Optional callable mapping user_ids to {user_id: (T, D) templates}
+                (e.g. DataManager.get_templates). The TEMPLATE_RERANK_K nearest users by
+                aggregate are then re-scored by their closest template.
+        Returns:
+            One list per query of (user_id, distance) below threshold, best first.
+        """
+        n_candidates = max(k, config.TEMPLATE_RERANK_K) if templates is not None else k
+        candidates = self._search(embeddings, stored_embeddings, n_candidates, block_size)
+        if templates is not None:
+            candidates = self._rerank(embeddings, candidates, templates)
+
+        results = [
+            [(user_id, distance) for user_id, distance in found if distance < self.threshold][:k]
+            for found in candidates
+        ]
+        matched = sum(1 for found in results if found)
+        metrics.increment("matches", matched)
+        metrics.increment("rejects", len(results) - matched)
+
+        return results
+
+    def _search(
+        self,
+        embeddings: np.ndarray,
+        stored_embeddings: list[tuple[str, np.ndarray]] | GalleryIndex | IVFIndex,
+        k: int,
+        block_size: int,
+    ) -> list[list[tuple[str, float]]]:
+        """Top-k (user_id, distance) per query, best first, before the threshold is applied."""
+        if isinstance(stored_embeddings, IVFIndex):
+            return [
+                stored_embeddings.search_topk(query, self.distance_metric, k)
+                for query in np.atleast_2d(embeddings)
+            ]
+
+        if isinstance(stored_embeddings, GalleryIndex):
+            index = stored_embeddings
+        else:
+            index = GalleryIndex.from_embeddings(stored_embeddings)
+
+        rows, dists = index.search_batch(embeddings, self.distance_metric, k, block_size)
+
+        results = []
+        for row_ids, row_dists in zip(rows, dists):
+            results.append([
+                (index.id_of(row), float(distance))
+                for row, distance in zip(row_ids, row_dists)
+                if row >= 0
+            ])
+
+        return results
+
+    def _rerank(
+        self, embeddings: np.ndarray, candidates: list[list[tuple[str, float]]], templates
+    ) -> list[list[tuple[str, float]]]:
+        """Replace each candidate's aggregate distance by its closest template's and re-sort."""
+        user_ids = {user_id for found in candidates for user_id, _ in found}
+        stored = templates(list(user_ids)) if user_ids else {}
+
+        results = []
+        for query, found in zip(np.atleast_2d(embeddings), candidates):
+            rescored = []
+            for user_id, distance in found:
+                if user_id in stored:
+                    distance = float(np.min(self.template_distances(query, stored[user_id])))
+                rescored.append((user_id, distance))
+            rescored.sort(key=lambda match: match[1])
+            results.append(rescored)
+
+        return results
+
+    @metrics.timed("verify")
+    def verify_claim(self, embedding: np.ndarray, templates: np.ndarray) -> tuple[bool, float]:
+        """
+        1:1 check of embedding against a claimed user's templates
+        (e.g. DataManager.get_user_templates), independent of gallery size.
+        Returns (verified, distance to the closest template).
+        """
+        distance = float(np.min(self.template_distances(embedding, templates)))
+        verified = distance < self.threshold
+        metrics.increment("matches" if verified else "rejects")
+
+        return verified, distance
+
+    def template_distances(self, embedding: np.ndarray, templates: np.ndarray) -> np.ndarray:
+        """calculate_distance from embedding to every row of a (T, D) template matrix."""
+        if self.distance_metric == "cosine":
+            norms = np.linalg.norm(templates, axis=1) * np.linalg.norm(embedding)
+            return 1 - (templates @ embedding) / norms
+        elif self.distance_metric == "euclidean":
+            return np.linalg.norm(templates - embedding, axis=1)
+        elif self.distance_metric == "euclidean_l2":
+            normalized = templates / np.linalg.norm(templates, axis=1, keepdims=True)
+            return np.linalg.norm(normalized - embedding / np.linalg.norm(embedding), axis=1)
+
+        return np.full(len(templates), float('inf'))
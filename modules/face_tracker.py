@@ -0,0 +1,152 @@
+"""Face Tracker Module - Frame-to-frame tracking so full detection doesn't run every frame."""
+
+import itertools
+import cv2
+import numpy as np
+import config
+from .face_detection import FaceDetector
+
+
+def _iou(a: dict, b: dict) -> float:
+    """Intersection over union of two x,y,w,h regions."""
+    x1, y1 = max(a['x'], b['x']), max(a['y'], b['y'])
+    x2 = min(a['x'] + a['w'], b['x'] + b['w'])
+    y2 = min(a['y'] + a['h'], b['y'] + b['h'])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a['w'] * a['h'] + b['w'] * b['h'] - inter
+
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """
+    Runs full detection every `detect_every` frames or when tracking confidence drops,
+    and follows the face in between with template matching in a window around the last box.
+    Each track keeps the identity recognised for it, so a tracked face isn't re-embedded.
+    """
+
+    def __init__(
+        self,
+        detector: FaceDetector,
+        detect_every: int = config.TRACKING_DETECT_EVERY,
+        min_score: float = config.TRACKING_MIN_SCORE,
+        search_margin: float = 0.5,
+        new_track_iou: float = 0.3,
+    ):
+        self.detector = detector
+        self.detect_every = detect_every
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.new_track_iou = new_track_iou
+
+        self.track_id = None
+        self.identity = None
+        self._track_ids = itertools.count(1)
+        self._template = None
+        self._region = None
+        self._frames_since_detect = 0
+
+        # Counters for measuring the detection reduction
+        self.frames = 0
+        self.detections = 0
+
+    def reset(self) -> None:
+        """Drop the current track."""
+        self.track_id = None
+        self.identity = None
+        self._template = None
+        self._region = None
+        self._frames_since_detect = 0
+
+    def set_identity(self, track_id: int, identity) -> None:
+        """
+        Cache a recognition result (e.g. (user, distance, version)) for a track, ignored if the
+        track has ended. It is cleared when detection starts a new track.
+        """
+        if track_id == self.track_id:
+            self.identity = identity
+
+    def clear_identity(self) -> None:
+        """Forget the current track's identity (e.g. its user was deleted), keeping the track."""
+        self.identity = None
+
+    def update(self, frame: np.ndarray) -> dict | None:
+        """
+        Locate the face in frame by tracking or, when due, full detection.
+        Returns dict with 'region', 'crop', 'track_id', 'identity', 'score' and
+        'detected' (True if full detection ran), or None if no face.
+        """
+        self.frames += 1
+
+        if self._region is not None and self._frames_since_detect < self.detect_every:
+            tracked = self._track(frame)
+            if tracked is not None:
+                self._frames_since_detect += 1
+                return tracked
+
+        return self._detect(frame)
+
+    def _detect(self, frame: np.ndarray) -> dict | None:
+        """Full detection; starts a new track unless the box overlaps the current one."""
+        self.detections += 1
+        self._frames_since_detect = 0
+
+        face_data = self.detector.detect_face(frame)
+        if face_data is None:
+            self.reset()
+            return None
+
+        region = face_data['region']
+        if self._region is None or _iou(region, self._region) < self.new_track_iou:
+            self.track_id = next(self._track_ids)
+            self.identity = None
+
+        self._region = region
+        self._template = self._patch(frame, region)
+        face_data.update(track_id=self.track_id, identity=self.identity, score=1.0, detected=True)
+
+        return face_data
+
+    def _track(self, frame: np.ndarray) -> dict | None:
+        """Template-match the last face patch inside a search window. None if lost."""
+        region = self._region
+        frame_h, frame_w = frame.shape[:2]
+        margin_x = int(region['w'] * self.search_margin)
+        margin_y = int(region['h'] * self.search_margin)
+        x0, y0 = max(0, region['x'] - margin_x), max(0, region['y'] - margin_y)
+        x1 = min(frame_w, region['x'] + region['w'] + margin_x)
+        y1 = min(frame_h, region['y'] + region['h'] + margin_y)
+
+        if self._template is None or x1 <= x0 or y1 <= y0:
+            return None
+        window = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        th, tw = self._template.shape
+        if window.shape[0] < th or window.shape[1] < tw:
+            return None
+
+        scores = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if score < self.min_score:
+            return None
+
+        self._region = {'x': x0 + dx, 'y': y0 + dy, 'w': tw, 'h': th}
+        crop = frame[self._region['y']:self._region['y'] + th, self._region['x']:self._region['x'] + tw]
+
+        return {
+            'region': dict(self._region),
+            'crop': crop,
+            'track_id': self.track_id,
+            'identity': self.identity,
+            'score': float(score),
+            'detected': False,
+        }
+
+    @staticmethod
+    def _patch(frame: np.ndarray, region: dict) -> np.ndarray | None:
+        """Grayscale patch of frame under region, used as the tracking template."""
+        x, y = max(0, region['x']), max(0, region['y'])
+        patch = frame[y:y + region['h'], x:x + region['w']]
+        if patch.size == 0:
+            return None
+
+        return cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
@@ -0,0 +1,78 @@
+"""Gallery Archive Module - Chunked columnar .npz file for moving a gallery between nodes."""
+
+import json
+import os
+import zipfile
+from collections.abc import Iterable, Iterator
+import numpy as np
+
+ARCHIVE_FORMAT = "face-id-gallery"
+ARCHIVE_VERSION = 1
+
+# Column arrays stored per chunk; template rows belong to users of the same chunk
+USER_COLUMNS = ("user_ids", "names", "created_at", "embeddings")
+TEMPLATE_COLUMNS = ("template_user_ids", "template_created_at", "templates")
+
+
+def write_archive(path: str, chunks: Iterable[dict], meta: dict) -> dict:
+    """
+    Write chunks of column arrays (USER_COLUMNS + TEMPLATE_COLUMNS) to a .npz archive.
+    Each chunk becomes its own set of .npy members, so only one chunk is held in memory.
+    meta (dim, dtype, ...) is stored with the row and chunk counts; the file is written
+    to a temporary path and atomically replaced. Returns the stored meta.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    meta = {**meta, 'format': ARCHIVE_FORMAT, 'version': ARCHIVE_VERSION, 'count': 0, 'templates': 0, 'chunks': 0}
+
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for chunk in chunks:
+                for column in USER_COLUMNS + TEMPLATE_COLUMNS:
+                    _write_member(archive, f"{column}_{meta['chunks']:06d}", np.asarray(chunk[column]))
+                meta['count'] += len(chunk['user_ids'])
+                meta['templates'] += len(chunk['template_user_ids'])
+                meta['chunks'] += 1
+            _write_member(archive, "meta", np.array(json.dumps(meta)))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+    return meta
+
+
+def read_meta(path: str) -> dict:
+    """Archive meta. Raises ValueError if path is not a gallery archive."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            meta = json.loads(str(_read_member(archive, "meta")))
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        raise ValueError(f"Not a gallery archive: {path}") from e
+    if meta.get('format') != ARCHIVE_FORMAT or meta.get('version', 0) > ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported gallery archive: {path}")
+
+    return meta
+
+
+def iter_archive(path: str) -> Iterator[dict]:
+    """Yield one dict of column arrays per chunk, in the order they were written."""
+    meta = read_meta(path)
+    with zipfile.ZipFile(path) as archive:
+        for index in range(meta['chunks']):
+            yield {
+                column: _read_member(archive, f"{column}_{index:06d}")
+                for column in USER_COLUMNS + TEMPLATE_COLUMNS
+            }
+
+
+def _write_member(archive: zipfile.ZipFile, name: str, array: np.ndarray) -> None:
+    # Plain .npy members, so np.load(path)[name] can read the archive too
+    with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+        np.lib.format.write_array(f, array, allow_pickle=False)
+
+
+def _read_member(archive: zipfile.ZipFile, name: str) -> np.ndarray:
+    with archive.open(f"{name}.npy") as f:
+        return np.lib.format.read_array(f, allow_pickle=False)
@@ -0,0 +1,376 @@
+"""Gallery Index Module - Vectorized in-memory embedding search."""
+
+import numpy as np
+
+
+class GalleryIndex:
+    """
+    Holds all stored embeddings as one contiguous matrix with precomputed norms.
+    Queries are answered with a single matrix-vector product plus argmin.
+    Wrapped (e.g. memory-mapped) arrays are never copied: changes go to an overlay of
+    hidden base rows plus an owned tail index whose rows follow the base rows.
+    """
+
+    def __init__(self, dim: int | None = None, capacity: int = 64):
+        self.dim = dim
+        self._capacity = capacity
+        self._size = 0
+        self._ids: list[str] = []
+        self._positions: dict[str, int] | None = {}
+        self._matrix = None
+        self._norms = None
+        self._sorted_ids = False
+        self._hidden: set[int] = set()
+        self._tail: GalleryIndex | None = None  # Set for wrapped arrays only
+        if dim is not None:
+            self._allocate(dim, capacity)
+
+    @classmethod
+    def from_embeddings(cls, stored_embeddings: list[tuple[str, np.ndarray]]) -> "GalleryIndex":
+        """Build index from a list of (user_id, embedding) tuples, keeping their order."""
+        index = cls(capacity=max(len(stored_embeddings), 1))
+        if not stored_embeddings:
+            return index
+
+        ids = [user_id for user_id, _ in stored_embeddings]
+        matrix = np.asarray([emb for _, emb in stored_embeddings], dtype=np.float64)
+        index._allocate(matrix.shape[1], len(ids))
+        index._matrix[:len(ids)] = matrix
+        index._norms[:len(ids)] = np.linalg.norm(matrix, axis=1)
+        index._ids = ids
+        index._positions = {user_id: i for i, user_id in enumerate(ids)}
+        index._size = len(ids)
+
+        return index
+
+    @classmethod
+    def from_arrays(
+        cls, ids: np.ndarray, matrix: np.ndarray, norms: np.ndarray, sorted_ids: bool = False
+    ) -> "GalleryIndex":
+        """
+        Wrap existing (e.g. memory-mapped, read-only) arrays without copying.
+        The arrays are never written; add/remove only touch the overlay.
+        sorted_ids lets user_id lookups binary-search ids instead of scanning them.
+        """
+        index = cls()
+        index.dim = matrix.shape[1]
+        index._capacity = max(matrix.shape[0], 1)
+        index._size = matrix.shape[0]
+        index._ids = ids if ids is None else np.asarray(ids)
+        index._positions = None
+        index._matrix = matrix
+        index._norms = norms
+        index._sorted_ids = sorted_ids
+        index._tail = cls(dim=index.dim)
+
+        return index
+
+    def __len__(self) -> int:
+        if self._tail is None:
+            return self._size
+        return self._size - len(self._hidden) + len(self._tail)
+
+    def __contains__(self, user_id: str) -> bool:
+        return self._row_of(user_id) is not None
+
+    @property
+    def ids(self) -> list[str]:
+        """User IDs in the order of matrix rows."""
+        if not self._has_overlay():
+            return self._ids
+        return [str(user_id) for user_id in self._ids[self._base_rows()]] + self._tail.ids
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(N, D) view of stored embeddings (a copy while a wrapped index has changes)."""
+        if self._matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float64)
+        if self._has_overlay():
+            return np.concatenate([self._matrix[self._base_rows()], self._tail.matrix])
+        return self._matrix[:self._size]
+
+    @property
+    def norms(self) -> np.ndarray:
+        """(N,) view of precomputed embedding norms, same order as matrix."""
+        if self._norms is None:
+            return np.empty(0, dtype=np.float64)
+        if self._has_overlay():
+            return np.concatenate([self._norms[self._base_rows()], self._tail.norms])
+        return self._norms[:self._size]
+
+    def id_of(self, row: int) -> str:
+        """User ID of a row returned by nearest/search_batch."""
+        if row >= self._size:
+            return self._tail.id_of(row - self._size)
+        return str(self._ids[row])
+
+    def embedding(self, row: int) -> np.ndarray:
+        """Stored embedding of a row returned by nearest/search_batch."""
+        if row >= self._size:
+            return self._tail.embedding(row - self._size)
+        return self._matrix[row]
+
+    def get(self, user_id: str) -> np.ndarray | None:
+        """Get stored embedding for user_id or None."""
+        row = self._row_of(user_id)
+        if row is None:
+            return None
+        return self.embedding(row)
+
+    def add(self, user_id: str, embedding: np.ndarray) -> None:
+        """Add or replace a single embedding without rebuilding the matrix."""
+        embedding = np.asarray(embedding, dtype=np.float64).ravel()
+        if self._tail is not None:
+            # Hide the stale base row; the tail holds the current embedding
+            self._tail.add(user_id, embedding)
+            row = self._base_row(user_id)
+            if row is not None:
+                self._hidden.add(row)
+            return
+        if self._matrix is None:
+            self._allocate(embedding.shape[0], self._capacity)
+        if embedding.shape[0] != self.dim:
+            raise ValueError(f"Embedding dimension {embedding.shape[0]} != index dimension {self.dim}")
+
+        row = self._position_map().get(user_id)
+        if row is None:
+            if self._size == self._capacity:
+                self._grow()
+            row = self._size
+            self._ids.append(user_id)
+            self._positions[user_id] = row
+            self._size += 1
+
+        self._matrix[row] = embedding
+        self._norms[row] = np.linalg.norm(embedding)
+
+    def remove(self, user_id: str) -> bool:
+        """Remove embedding by moving the last row into its slot. Returns True if removed."""
+        if self._tail is not None:
+            if self._tail.remove(user_id):
+                return True
+            row = self._base_row(user_id)
+            if row is None or row in self._hidden:
+                return False
+            self._hidden.add(row)
+            return True
+        if user_id not in self._position_map():
+            return False
+        row = self._positions.pop(user_id)
+
+        last = self._size - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._norms[row] = self._norms[last]
+            self._ids[row] = moved_id
+            self._positions[moved_id] = row
+        self._ids.pop()
+        self._size -= 1
+
+        return True
+
+    def distances(self, query: np.ndarray, metric: str) -> np.ndarray:
+        """Distances from query to every row, in search row order (hidden rows are inf)."""
+        query = np.asarray(query, dtype=np.float64).ravel()
+        if self._tail is None:
+            return self._distances(query, metric)
+
+        distances = np.concatenate([self._distances(query, metric), self._tail.distances(query, metric)])
+        distances[self._hidden_rows()] = np.inf
+
+        return distances
+
+    def nearest(self, query: np.ndarray, metric: str) -> tuple[int, float] | None:
+        """Return (row, distance) of the nearest stored embedding or None if empty."""
+        if len(self) == 0:
+            return None
+
+        distances = self.distances(query, metric)
+        # NaN (zero-norm vectors) never wins, same as the scalar comparison loop
+        distances = np.where(np.isnan(distances), np.inf, distances)
+        row = int(np.argmin(distances))
+        if not np.isfinite(distances[row]):
+            return None
+
+        return (row, float(distances[row]))
+
+    def search(self, query: np.ndarray, metric: str) -> tuple[str, float] | None:
+        """Return (user_id, distance) of the nearest stored embedding or None if empty."""
+        best = self.nearest(query, metric)
+        if best is None:
+            return None
+
+        return (self.id_of(best[0]), best[1])
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        metric: str,
+        k: int = 1,
+        block_size: int = 1024,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k search for many queries using blocked matrix-matrix products.
+        Peak memory is bounded by block_size x (block_size + k) distances.
+        Args:
+            queries: (M, D) query matrix
+            metric: cosine, euclidean or euclidean_l2
+            k: Number of neighbours per query
+            block_size: Rows per query block and per gallery block
+        Returns:
+            (rows, distances), both (M, k') sorted ascending, k' = min(k, N).
+            Rows of non-finite distances are -1; see id_of/embedding.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        k = min(k, len(self))
+        n_queries = queries.shape[0]
+        rows = np.full((n_queries, k), -1, dtype=np.int64)
+        dists = np.full((n_queries, k), np.inf)
+        if k == 0:
+            return rows, dists
+
+        hidden = self._hidden_rows()
+        for q_start in range(0, n_queries, block_size):
+            q_block = queries[q_start:q_start + block_size]
+            best_rows = np.empty((q_block.shape[0], 0), dtype=np.int64)
+            best_dists = np.empty((q_block.shape[0], 0))
+
+            for segment, g_start, g_end, offset in self._blocks(block_size):
+                block_dists = segment.block_distances(q_block, g_start, g_end, metric)
+                block_dists = np.where(np.isnan(block_dists), np.inf, block_dists)
+                if segment is self and len(hidden):
+                    in_block = hidden[(hidden >= g_start) & (hidden < g_end)]
+                    block_dists[:, in_block - g_start] = np.inf
+                block_rows = np.broadcast_to(np.arange(offset + g_start, offset + g_end), block_dists.shape)
+
+                # Merge running top-k with this block
+                cand_dists = np.concatenate([best_dists, block_dists], axis=1)
+                cand_rows = np.concatenate([best_rows, block_rows], axis=1)
+                if cand_dists.shape[1] > k:
+                    keep = np.argpartition(cand_dists, k - 1, axis=1)[:, :k]
+                    cand_dists = np.take_along_axis(cand_dists, keep, axis=1)
+                    cand_rows = np.take_along_axis(cand_rows, keep, axis=1)
+                best_dists, best_rows = cand_dists, cand_rows
+
+            order = np.lexsort((best_rows, best_dists), axis=1)
+            best_dists = np.take_along_axis(best_dists, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+            best_rows[~np.isfinite(best_dists)] = -1
+
+            dists[q_start:q_start + block_size] = best_dists
+            rows[q_start:q_start + block_size] = best_rows
+
+        return rows, dists
+
+    def _distances(self, query: np.ndarray, metric: str) -> np.ndarray:
+        """Distances from query to this index's own rows (no overlay), in the storage dtype."""
+        if self._matrix is None:
+            return np.empty(0, dtype=np.float64)
+        matrix, norms = self._matrix[:self._size], self._norms[:self._size]
+        # A float64 query would promote a float32 matrix to a float64 copy on every call
+        query = query.astype(matrix.dtype, copy=False)
+        dots = matrix @ query
+        query_norm = np.linalg.norm(query)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if metric == "cosine":
+                return 1 - dots / (norms * query_norm)
+            elif metric == "euclidean":
+                squared = norms ** 2 + query_norm ** 2 - 2 * dots
+                return np.sqrt(np.maximum(squared, 0))
+            elif metric == "euclidean_l2":
+                cosine = dots / (norms * query_norm)
+                return np.sqrt(np.maximum(2 - 2 * cosine, 0))
+
+        return np.full(self._size, np.inf)
+
+    def _blocks(self, block_size: int):
+        """Yield (index, start, end, row offset) blocks over the base rows and then the tail."""
+        segments = [(self, 0)] if self._tail is None else [(self, 0), (self._tail, self._size)]
+        for segment, offset in segments:
+            for start in range(0, segment._size, block_size):
+                yield segment, start, min(start + block_size, segment._size), offset
+
+    def block_distances(
+        self, queries: np.ndarray, start: int, end: int, metric: str
+    ) -> np.ndarray:
+        """
+        (Mb, Nb) distances between a query block and this index's own rows [start, end), in the
+        storage dtype. Rows of an overlay tail are not included.
+        """
+        queries = queries.astype(self._matrix.dtype, copy=False)
+        dots = queries @ self._matrix[start:end].T
+        query_norms = np.linalg.norm(queries, axis=1)[:, None]
+        norms = self._norms[start:end][None, :]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if metric == "cosine":
+                return 1 - dots / (query_norms * norms)
+            elif metric == "euclidean":
+                squared = query_norms ** 2 + norms ** 2 - 2 * dots
+                return np.sqrt(np.maximum(squared, 0))
+            elif metric == "euclidean_l2":
+                cosine = dots / (query_norms * norms)
+                return np.sqrt(np.maximum(2 - 2 * cosine, 0))
+
+        return np.full(dots.shape, np.inf)
+
+    def _position_map(self) -> dict[str, int]:
+        """user_id -> row mapping of owned storage, built lazily."""
+        if self._positions is None:
+            self._positions = {str(user_id): i for i, user_id in enumerate(self._ids)}
+        return self._positions
+
+    def _row_of(self, user_id: str) -> int | None:
+        """Search row holding user_id, or None."""
+        if self._tail is None:
+            return self._position_map().get(user_id)
+        row = self._tail._row_of(user_id)
+        if row is not None:
+            return self._size + row
+        row = self._base_row(user_id)
+        if row is None or row in self._hidden:
+            return None
+        return row
+
+    def _base_row(self, user_id: str) -> int | None:
+        """Row of user_id in the wrapped arrays (hidden or not), without building a map over them."""
+        if self._ids is None or self._size == 0:
+            return None
+        if self._sorted_ids:
+            row = int(np.searchsorted(self._ids, user_id))
+            if row < self._size and self._ids[row] == user_id:
+                return row
+            return None
+        rows = np.flatnonzero(self._ids == user_id)
+        return int(rows[0]) if len(rows) else None
+
+    def _has_overlay(self) -> bool:
+        return self._tail is not None and (bool(self._hidden) or len(self._tail) > 0)
+
+    def _hidden_rows(self) -> np.ndarray:
+        return np.fromiter(self._hidden, dtype=np.int64, count=len(self._hidden))
+
+    def _base_rows(self) -> np.ndarray:
+        """Visible rows of the wrapped arrays, in order."""
+        keep = np.ones(self._size, dtype=bool)
+        keep[self._hidden_rows()] = False
+        return np.flatnonzero(keep)
+
+    def _allocate(self, dim: int, capacity: int) -> None:
+        """Allocate empty storage for the given dimension."""
+        self.dim = dim
+        self._capacity = max(capacity, 1)
+        self._matrix = np.empty((self._capacity, dim), dtype=np.float64)
+        self._norms = np.empty(self._capacity, dtype=np.float64)
+
+    def _grow(self) -> None:
+        """Double capacity, copying existing rows."""
+        self._capacity *= 2
+        matrix = np.empty((self._capacity, self.dim), dtype=np.float64)
+        norms = np.empty(self._capacity, dtype=np.float64)
+        matrix[:self._size] = self._matrix[:self._size]
+        norms[:self._size] = self._norms[:self._size]
+        self._matrix = matrix
+        self._norms = norms
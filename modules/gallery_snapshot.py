@@ -0,0 +1,116 @@
+"""Gallery Snapshot Module - Flat memory-mappable gallery file for zero-copy startup."""
+
+import json
+import os
+import struct
+from collections.abc import Iterable
+import numpy as np
+from .gallery_index import GalleryIndex
+
+SNAPSHOT_MAGIC = b"FACEGAL1"
+HEADER_SIZE = 4096  # Header block, keeps every section page-aligned
+ALIGNMENT = 4096
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(
+    path: str,
+    chunks: Iterable[tuple[list[str], np.ndarray]],
+    count: int,
+    dim: int,
+    id_width: int,
+    version: int,
+    sorted_ids: bool = False,
+) -> None:
+    """
+    Write gallery snapshot from (user_ids, (n, D) matrix) chunks.
+    Layout: header block | ids (U{id_width}) | norms (float64) | matrix (float64, N x D).
+    sorted_ids records that chunks arrive in ascending user_id order, which lets
+    the loaded index look users up by binary search.
+    The file is written to a temporary path and atomically replaced.
+    """
+    id_width = max(id_width, 1)
+    ids_offset = HEADER_SIZE
+    norms_offset = _align(ids_offset + count * id_width * 4)
+    matrix_offset = _align(norms_offset + count * 8)
+    total_size = matrix_offset + count * dim * 8
+
+    header = {
+        'version': version,
+        'count': count,
+        'dim': dim,
+        'id_width': id_width,
+        'ids_offset': ids_offset,
+        'norms_offset': norms_offset,
+        'matrix_offset': matrix_offset,
+        'sorted_ids': sorted_ids,
+    }
+    header_bytes = json.dumps(header).encode()
+    if len(SNAPSHOT_MAGIC) + 8 + len(header_bytes) > HEADER_SIZE:
+        raise ValueError("Snapshot header too large")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        f.truncate(max(total_size, HEADER_SIZE))
+
+    written = 0
+    if count:
+        ids = np.memmap(tmp_path, dtype=f"<U{id_width}", mode="r+", offset=ids_offset, shape=(count,))
+        norms = np.memmap(tmp_path, dtype="<f8", mode="r+", offset=norms_offset, shape=(count,))
+        matrix = np.memmap(tmp_path, dtype="<f8", mode="r+", offset=matrix_offset, shape=(count, dim))
+        for chunk_ids, chunk_matrix in chunks:
+            end = written + len(chunk_ids)
+            if end > count:
+                raise ValueError("Snapshot received more rows than declared")
+            ids[written:end] = chunk_ids
+            matrix[written:end] = chunk_matrix
+            norms[written:end] = np.linalg.norm(chunk_matrix, axis=1)
+            written = end
+        matrix.flush()
+        norms.flush()
+        ids.flush()
+        del ids, norms, matrix
+
+    if written != count:
+        os.remove(tmp_path)
+        raise ValueError(f"Snapshot expected {count} rows, got {written}")
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str) -> dict | None:
+    """Read snapshot header. Returns None if the file is missing or not a snapshot."""
+    try:
+        with open(path, "rb") as f:
+            prefix = f.read(len(SNAPSHOT_MAGIC) + 8)
+            if len(prefix) < len(SNAPSHOT_MAGIC) + 8 or prefix[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                return None
+            (length,) = struct.unpack("<Q", prefix[len(SNAPSHOT_MAGIC):])
+            return json.loads(f.read(length))
+    except (OSError, ValueError):
+        return None
+
+
+def load_snapshot(path: str, header: dict | None = None) -> GalleryIndex:
+    """
+    Memory-map snapshot read-only and wrap it in a GalleryIndex.
+    Processes mapping the same file share one page-cache copy; later changes
+    go to the index overlay, so the mapping is never copied.
+    """
+    header = header or read_header(path)
+    if header is None:
+        raise ValueError(f"Not a gallery snapshot: {path}")
+
+    count, dim = header['count'], header['dim']
+    if count == 0:
+        return GalleryIndex(dim=dim or None)
+
+    ids = np.memmap(path, dtype=f"<U{header['id_width']}", mode="r", offset=header['ids_offset'], shape=(count,))
+    norms = np.memmap(path, dtype="<f8", mode="r", offset=header['norms_offset'], shape=(count,))
+    matrix = np.memmap(path, dtype="<f8", mode="r", offset=header['matrix_offset'], shape=(count, dim))
+
+    return GalleryIndex.from_arrays(ids, matrix, norms, sorted_ids=header.get('sorted_ids', False))
@@ -0,0 +1,265 @@
+"""IVF Index Module - Approximate nearest-neighbour search for large galleries."""
+
+import os
+import numpy as np
+from .gallery_index import GalleryIndex
+
+
+class IVFIndex:
+    """
+    Inverted-file index: k-means coarse centroids, one GalleryIndex per list.
+    A query only scans the nprobe lists whose centroids are closest.
+    """
+
+    def __init__(
+        self,
+        distance_metric: str,
+        nlist: int | None = None,
+        nprobe: int = 8,
+    ):
+        self.distance_metric = distance_metric
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.trained_size = 0
+        self._lists: list[GalleryIndex] = []
+        self._assignments: dict[str, int] = {}
+        self.version = 0  # Change-log version the contents reflect, stored by save()
+
+    def __len__(self) -> int:
+        return len(self._assignments)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._assignments
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def ids(self) -> list[str]:
+        """All user IDs, grouped by inverted list."""
+        return [user_id for inv_list in self._lists for user_id in inv_list.ids]
+
+    def get(self, user_id: str) -> np.ndarray | None:
+        """Get stored embedding for user_id or None."""
+        list_no = self._assignments.get(user_id)
+        if list_no is None:
+            return None
+        return self._lists[list_no].get(user_id)
+
+    def train(
+        self,
+        matrix: np.ndarray,
+        iterations: int = 20,
+        max_points_per_centroid: int = 256,
+        seed: int = 0,
+    ) -> None:
+        """Fit coarse centroids with k-means on (a sample of) the given matrix."""
+        vectors = self._to_search_space(np.asarray(matrix, dtype=np.float64))
+        n = vectors.shape[0]
+        if n == 0:
+            raise ValueError("Cannot train IVF index on an empty gallery")
+
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, nlist * max_points_per_centroid)
+        sample = vectors[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = self._nearest_centroids(sample, centroids, 1)[:, 0]
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+
+            empty = counts == 0
+            centroids[~empty] = sums[~empty] / counts[~empty, None]
+            # Re-seed empty clusters from random points
+            if empty.any():
+                centroids[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            if self.distance_metric != "euclidean":
+                centroids = self._normalize(centroids)
+
+        self.centroids = centroids
+        self.trained_size = n
+        self._lists = [GalleryIndex(dim=vectors.shape[1]) for _ in range(nlist)]
+        self._assignments = {}
+
+    @classmethod
+    def build(
+        cls,
+        stored_embeddings: list[tuple[str, np.ndarray]],
+        distance_metric: str,
+        nlist: int | None = None,
+        nprobe: int = 8,
+    ) -> "IVFIndex":
+        """Train on and add all (user_id, embedding) tuples."""
+        index = cls(distance_metric, nlist, nprobe)
+        if not stored_embeddings:
+            return index
+
+        matrix = np.asarray([emb for _, emb in stored_embeddings], dtype=np.float64)
+        index.train(matrix)
+        index.add_batch([user_id for user_id, _ in stored_embeddings], matrix)
+
+        return index
+
+    def add(self, user_id: str, embedding: np.ndarray) -> None:
+        """Add or replace one embedding in its nearest list."""
+        embedding = np.asarray(embedding, dtype=np.float64).ravel()
+        self.add_batch([user_id], embedding[None, :])
+
+    def add_batch(self, user_ids: list[str], matrix: np.ndarray) -> None:
+        """Assign and add many embeddings. Trains on them first if untrained."""
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+        if not self.is_trained:
+            self.train(matrix)
+
+        labels = self._nearest_centroids(self._to_search_space(matrix), self.centroids, 1)[:, 0]
+        for user_id, embedding, label in zip(user_ids, matrix, labels):
+            self.remove(user_id)
+            self._lists[label].add(user_id, embedding)
+            self._assignments[user_id] = int(label)
+
+    def retrain(self) -> None:
+        """Re-fit centroids on the current contents and reassign every embedding."""
+        ids = list(self._assignments)
+        if not ids:
+            return
+        matrix = np.array([self.get(user_id) for user_id in ids])
+        self.centroids = None
+        self.train(matrix)
+        self.add_batch(ids, matrix)
+
+    def needs_retrain(self, growth: float = 2.0) -> bool:
+        """True once the gallery has grown by `growth`x since the last training."""
+        return len(self) > growth * max(self.trained_size, 1)
+
+    def remove(self, user_id: str) -> bool:
+        """Remove embedding by user_id. Returns True if removed."""
+        list_no = self._assignments.pop(user_id, None)
+        if list_no is None:
+            return False
+        return self._lists[list_no].remove(user_id)
+
+    def search(self, query: np.ndarray, metric: str) -> tuple[str, float] | None:
+        """Return (user_id, distance) of the nearest embedding within the probed lists."""
+        if not self._assignments:
+            return None
+
+        query = np.asarray(query, dtype=np.float64).ravel()
+        probe = self._nearest_centroids(
+            self._to_search_space(query[None, :]), self.centroids, self.nprobe
+        )[0]
+
+        best = None
+        for list_no in probe:
+            candidate = self._lists[list_no].search(query, metric)
+            if candidate and (best is None or candidate[1] < best[1]):
+                best = candidate
+
+        return best
+
+    def search_topk(self, query: np.ndarray, metric: str, k: int) -> list[tuple[str, float]]:
+        """Return up to k (user_id, distance) pairs from the probed lists, best first."""
+        if not self._assignments:
+            return []
+
+        query = np.asarray(query, dtype=np.float64).ravel()
+        probe = self._nearest_centroids(
+            self._to_search_space(query[None, :]), self.centroids, self.nprobe
+        )[0]
+
+        candidates = []
+        for list_no in probe:
+            inv_list = self._lists[list_no]
+            rows, dists = inv_list.search_batch(query[None, :], metric, k)
+            candidates.extend(
+                (inv_list.ids[row], float(distance))
+                for row, distance in zip(rows[0], dists[0])
+                if row >= 0
+            )
+
+        return sorted(candidates, key=lambda c: c[1])[:k]
+
+    def save(self, path: str) -> None:
+        """Persist centroids, assignments and list contents to an .npz file."""
+        ids = list(self._assignments)
+        dim = self.centroids.shape[1] if self.is_trained else 0
+        matrix = np.array([self.get(user_id) for user_id in ids]).reshape(len(ids), dim)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                distance_metric=np.array(self.distance_metric),
+                nlist=np.array(self.nlist or 0),
+                nprobe=np.array(self.nprobe),
+                trained_size=np.array(self.trained_size),
+                centroids=self.centroids if self.is_trained else np.empty((0, 0)),
+                ids=np.array(ids, dtype=str),
+                labels=np.array([self._assignments[user_id] for user_id in ids], dtype=np.int64),
+                matrix=matrix,
+                version=np.array(self.version),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """Load index saved with save()."""
+        with np.load(path) as data:
+            index = cls(
+                str(data['distance_metric']),
+                int(data['nlist']) or None,
+                int(data['nprobe']),
+            )
+            # Files written before versions were stored replay the whole change log
+            index.version = int(data['version']) if 'version' in data else 0
+            if data['centroids'].size == 0:
+                return index
+
+            index.centroids = data['centroids']
+            index.trained_size = int(data['trained_size'])
+            index._lists = [GalleryIndex(dim=index.centroids.shape[1]) for _ in range(len(index.centroids))]
+            for user_id, label, embedding in zip(data['ids'], data['labels'], data['matrix']):
+                index._lists[label].add(str(user_id), embedding)
+                index._assignments[str(user_id)] = int(label)
+
+        return index
+
+    def _to_search_space(self, vectors: np.ndarray) -> np.ndarray:
+        """Unit-normalize for angular metrics so clustering matches the query metric."""
+        if self.distance_metric == "euclidean":
+            return vectors
+        return self._normalize(vectors)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def _nearest_centroids(
+        vectors: np.ndarray, centroids: np.ndarray, n: int, block_size: int = 4096
+    ) -> np.ndarray:
+        """Indices of the n nearest centroids per vector, in blocks to bound memory."""
+        n = min(n, centroids.shape[0])
+        centroid_sq = np.sum(centroids ** 2, axis=1)
+        result = np.empty((vectors.shape[0], n), dtype=np.int64)
+
+        for start in range(0, vectors.shape[0], block_size):
+            block = vectors[start:start + block_size]
+            # ||x||^2 is constant per row and does not change the ranking
+            dists = centroid_sq[None, :] - 2 * block @ centroids.T
+            if n == 1:
+                result[start:start + block_size, 0] = np.argmin(dists, axis=1)
+            else:
+                nearest = np.argpartition(dists, n - 1, axis=1)[:, :n]
+                order = np.argsort(np.take_along_axis(dists, nearest, axis=1), axis=1)
+                result[start:start + block_size] = np.take_along_axis(nearest, order, axis=1)
+
+        return result
@@ -0,0 +1,209 @@
+"""Metrics Module - Per-stage latency histograms, event counters and Prometheus export."""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+import config
+
+# Histogram bucket upper bounds in ms (Prometheus-style cumulative "le" buckets)
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within buckets."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile (0..1); the +Inf bucket reports the observed max."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i]
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+
+        return self.max
+
+
+class Metrics:
+    """
+    Registry of stage latencies, event counters and gauges.
+    When disabled, timed()/timer() cost one attribute check and nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = config.METRICS_ENABLED, prefix: str = "face_id"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._histograms: dict[str, Histogram] = {}
+        self._counters: dict[tuple[str, tuple], int] = {}
+        self._gauges: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._log_stop: threading.Event | None = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def observe(self, stage: str, ms: float) -> None:
+        """Record one stage latency in ms."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(ms)
+
+    def increment(self, event: str, value: int = 1, **labels) -> None:
+        """Add value to an event counter, e.g. increment("failures", stage="detect")."""
+        if not self.enabled:
+            return
+        key = (event, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name] = value
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the with-block as stage."""
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start_time) * 1000)
+
+    def timed(self, stage: str):
+        """Decorator recording every call's latency as stage."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start_time = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, (time.perf_counter() - start_time) * 1000)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict:
+        """Current values: per-stage count/mean/p50/p95/p99/max, counters and gauges."""
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': h.count,
+                    'mean_ms': h.sum / h.count if h.count else 0.0,
+                    'p50_ms': h.quantile(0.50),
+                    'p95_ms': h.quantile(0.95),
+                    'p99_ms': h.quantile(0.99),
+                    'max_ms': h.max,
+                }
+                for stage, h in self._histograms.items()
+            }
+            counters = {
+                event + "".join(f"[{k}={v}]" for k, v in labels): value
+                for (event, labels), value in self._counters.items()
+            }
+            return {'stages': stages, 'counters': counters, 'gauges': dict(self._gauges)}
+
+    def export_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        name = f"{self.prefix}_stage_latency_ms"
+        lines = [f"# HELP {name} Pipeline stage latency in milliseconds.", f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+            for event in sorted({event for event, _ in self._counters}):
+                counter = f"{self.prefix}_{event}_total"
+                lines += [f"# TYPE {counter} counter"]
+                for (other, labels), value in sorted(self._counters.items()):
+                    if other == event:
+                        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                        lines.append(f"{counter}{{{label_text}}} {value}" if label_text else f"{counter} {value}")
+
+            for gauge, value in sorted(self._gauges.items()):
+                lines += [f"# TYPE {self.prefix}_{gauge} gauge", f"{self.prefix}_{gauge} {value}"]
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One-line-per-stage human-readable summary."""
+        snapshot = self.snapshot()
+        lines = [
+            f"{stage}: n={s['count']} p50={s['p50_ms']:.1f}ms p95={s['p95_ms']:.1f}ms "
+            f"p99={s['p99_ms']:.1f}ms max={s['max_ms']:.1f}ms"
+            for stage, s in sorted(snapshot['stages'].items())
+        ]
+        events = {**snapshot['counters'], **snapshot['gauges']}
+        if events:
+            lines.append(", ".join(f"{key}={value:g}" for key, value in sorted(events.items())))
+
+        return "\n".join(lines)
+
+    def start_log_summary(self, interval: float = config.METRICS_LOG_INTERVAL) -> None:
+        """Log summary() every interval seconds on a daemon thread."""
+        if interval <= 0 or self._log_stop is not None:
+            return
+        self._log_stop = threading.Event()
+
+        def loop(stop: threading.Event):
+            while not stop.wait(interval):
+                if self.enabled:
+                    logger.info("Pipeline metrics:\n%s", self.summary())
+
+        threading.Thread(target=loop, args=(self._log_stop,), name="metrics-log", daemon=True).start()
+
+    def stop_log_summary(self) -> None:
+        if self._log_stop is not None:
+            self._log_stop.set()
+            self._log_stop = None
+
+
+# Process-wide registry used by the instrumented modules
+metrics = Metrics()
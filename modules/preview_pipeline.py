@@ -0,0 +1,155 @@
+"""Preview Pipeline Module - Threaded camera capture and face detection for the live preview."""
+
+import threading
+import time
+import numpy as np
+from .face_detection import FaceDetector
+from .face_tracker import FaceTracker
+
+
+class LatestQueue:
+    """Single-slot queue: put() overwrites the unread item, so consumers only see the newest."""
+
+    def __init__(self):
+        self._item = None
+        self._has_item = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item) -> None:
+        """Store item, dropping any item not consumed yet."""
+        with self._cond:
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None):
+        """Take the newest item, waiting up to timeout seconds. Returns None if empty."""
+        with self._cond:
+            if not self._has_item:
+                self._cond.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def get_nowait(self):
+        """Take the newest item without waiting. Returns None if empty."""
+        return self.get(timeout=0)
+
+    def clear(self) -> None:
+        with self._cond:
+            self._item = None
+            self._has_item = False
+
+
+class PreviewPipeline:
+    """
+    Capture thread -> detection worker -> UI consumer, connected by latest-frame-wins queues.
+    The UI shows every captured frame with the last known face box while detection
+    runs at its own rate on whichever frame is newest when it becomes free.
+    With a tracker, full detection only runs every few frames and boxes are tracked in between.
+    Each start() begins a new run with its own stop event; results from an older run's
+    threads (e.g. one still inside detection after stop() timed out) are discarded.
+    """
+
+    def __init__(self, detector: FaceDetector, tracker: FaceTracker | None = None):
+        self.detector = detector
+        self.tracker = tracker
+        self.display_queue = LatestQueue()
+        self.detect_queue = LatestQueue()
+        self._stop_event: threading.Event | None = None
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._generation = 0  # Run counter; writes are accepted only from the current run
+        self._latest_frame = None
+        self._face_data = None
+
+    @property
+    def running(self) -> bool:
+        return self._stop_event is not None and not self._stop_event.is_set()
+
+    @property
+    def latest_frame(self) -> np.ndarray | None:
+        """Most recently captured frame (a copy, safe to modify)."""
+        with self._lock:
+            return None if self._latest_frame is None else self._latest_frame.copy()
+
+    @property
+    def face_data(self) -> dict | None:
+        """Last detection result, possibly from an older frame."""
+        with self._lock:
+            return self._face_data
+
+    def start(self) -> None:
+        """Start capture and detection threads. Camera must already be started."""
+        if self.running:
+            return
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._stop_event = stop_event = threading.Event()
+        self._threads = [
+            threading.Thread(
+                target=self._capture_loop, args=(stop_event, generation), name="preview-capture", daemon=True
+            ),
+            threading.Thread(
+                target=self._detect_loop, args=(stop_event, generation), name="preview-detect", daemon=True
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop threads and reset state. Call before releasing the camera."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        with self._lock:
+            # Threads that outlived the join can no longer publish anything
+            self._generation += 1
+            self.display_queue.clear()
+            self.detect_queue.clear()
+            self._latest_frame = None
+            self._face_data = None
+        if self.tracker:
+            self.tracker.reset()
+
+    def get_display(self) -> tuple[np.ndarray | None, dict | None]:
+        """Newest frame not shown yet (or None) and the last known face data."""
+        return self.display_queue.get_nowait(), self.face_data
+
+    def _capture_loop(self, stop_event: threading.Event, generation: int) -> None:
+        """Read frames at camera rate and hand them to display and detection."""
+        while not stop_event.is_set():
+            frame = self.detector.get_frame()
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._latest_frame = frame
+                self.display_queue.put(frame)
+                self.detect_queue.put(frame)
+
+    def _detect_loop(self, stop_event: threading.Event, generation: int) -> None:
+        """Run detection on the newest frame whenever the previous detection finishes."""
+        while not stop_event.is_set():
+            frame = self.detect_queue.get(timeout=0.1)
+            if frame is None:
+                continue
+            if self.tracker:
+                face_data = self.tracker.update(frame)
+            else:
+                face_data = self.detector.detect_face(frame)
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._face_data = face_data
@@ -0,0 +1,391 @@
+"""Recognition Service Module - Local asyncio HTTP service with embedding micro-batching."""
+
+import asyncio
+import base64
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+import cv2
+import numpy as np
+import config
+from .face_detection import FaceDetector
+from .face_recognition import FaceRecognizer
+from .data_manager import DataManager
+from .metrics import metrics
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                409: "Conflict", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+                500: "Internal Server Error"}
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_HEADER_LINES = 100
+
+
+class HTTPError(Exception):
+    """Error returned to the client as a JSON response with the given status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into micro-batches: a batch is run when it
+    reaches max_batch crops or max_wait_ms after its first crop arrived, whichever is first.
+    """
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        executor: ThreadPoolExecutor,
+        max_batch: int = config.SERVICE_MAX_BATCH,
+        max_wait_ms: float = config.SERVICE_MAX_WAIT_MS,
+    ):
+        self.recognizer = recognizer
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.items = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def embed(self, crop: np.ndarray) -> np.ndarray | None:
+        """Queue one face crop and wait for its embedding."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((crop, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            crops = [crop for crop, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(
+                    self.executor, lambda: self.recognizer.extract_embeddings(crops, skip_detection=True)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+
+class RecognitionService:
+    """
+    One process holding the model and gallery for many clients.
+    Endpoints (JSON bodies, images as base64 under "image"):
+        POST   /verify            1:N identification of every face in the image
+        POST   /verify/<user_id>  1:1 check against a claimed identity ({"fallback": true} adds 1:N on mismatch)
+        POST   /enroll            {"user_id", "name", "image"}
+        DELETE /users/<user_id>
+        GET    /health
+        GET    /metrics           Prometheus text format (METRICS_ENABLED)
+    """
+
+    def __init__(
+        self,
+        detector: FaceDetector | None = None,
+        recognizer: FaceRecognizer | None = None,
+        data_manager: DataManager | None = None,
+        detect_workers: int = config.SERVICE_DETECT_WORKERS,
+    ):
+        self.detector = detector or FaceDetector()
+        self.recognizer = recognizer or FaceRecognizer()
+        self.data_manager = data_manager or DataManager()
+
+        # sqlite connections are per-thread: all DB work runs on one thread
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="service-db")
+        self._detect_executor = ThreadPoolExecutor(max_workers=detect_workers, thread_name_prefix="service-detect")
+        self._model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="service-model")
+        self.batcher = EmbeddingBatcher(self.recognizer, self._model_executor)
+        self._server = None
+
+    async def start(self, host: str = config.SERVICE_HOST, port: int = config.SERVICE_PORT) -> None:
+        """Connect the database, load the model once and start listening."""
+        await self._in_db(self.data_manager.connect)
+        await self._in_db(self.data_manager.get_gallery)
+        # Warm up: the first represent() call builds the model
+        await asyncio.get_running_loop().run_in_executor(
+            self._model_executor,
+            lambda: self.recognizer.extract_embedding(np.zeros((160, 160, 3), dtype=np.uint8), skip_detection=True),
+        )
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        await self._in_db(self.data_manager.close)
+        for executor in (self._db_executor, self._detect_executor, self._model_executor):
+            executor.shutdown(wait=False)
+
+    async def _in_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    # The rest of the stream can't be framed: answer, then drop the connection
+                    await self._write_response(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = 200, await self._dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': e.message}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, payload: dict | str, keep_alive: bool) -> None:
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        """One request or header line; lines longer than the reader's buffer limit are a 431."""
+        try:
+            return await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HTTPError(431, "Request line or header field too large.")
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, dict, bytes] | None:
+        """
+        Parse one request. Returns None when the client closed the connection.
+        Raises HTTPError (400, 413, 431) for requests that can't be read.
+        """
+        line = await RecognitionService._read_line(reader)
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.")
+
+        headers = {}
+        for count in itertools.count():
+            line = await RecognitionService._read_line(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if count == MAX_HEADER_LINES:
+                raise HTTPError(431, "Too many header fields.")
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length.")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        return method.upper(), unquote(path.split("?", 1)[0]), headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> dict | str:
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            return {'status': 'ok', 'batches': self.batcher.batches, 'embedded': self.batcher.items}
+        if parts == ["metrics"] and method == "GET":
+            return metrics.export_prometheus()
+        if parts == ["verify"]:
+            self._require(method, "POST")
+            return await self._verify(self._parse_json(body))
+        if len(parts) == 2 and parts[0] == "verify":
+            self._require(method, "POST")
+            return await self._verify_claimed(parts[1], self._parse_json(body))
+        if parts == ["enroll"]:
+            self._require(method, "POST")
+            return await self._enroll(self._parse_json(body))
+        if len(parts) == 2 and parts[0] == "users":
+            self._require(method, "DELETE")
+            if not await self._in_db(self.data_manager.delete_user, parts[1]):
+                raise HTTPError(404, "User not found.")
+            return {'deleted': parts[1]}
+
+        raise HTTPError(404, "Unknown endpoint.")
+
+    @staticmethod
+    def _require(method: str, expected: str) -> None:
+        if method != expected:
+            raise HTTPError(405, f"Use {expected}.")
+
+    @staticmethod
+    def _parse_json(body: bytes) -> dict:
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON.")
+
+    @staticmethod
+    def _decode_image(payload: dict) -> np.ndarray:
+        """Decode base64 JPEG/PNG under payload['image'] to a BGR frame."""
+        try:
+            data = base64.b64decode(payload['image'])
+        except (KeyError, ValueError, TypeError):
+            raise HTTPError(400, "Missing or invalid base64 'image'.")
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise HTTPError(400, "Could not decode image.")
+        return image
+
+    async def _embed_faces(self, image: np.ndarray, timings: dict) -> list[dict]:
+        """Detect faces (thread pool) and embed their crops (micro-batched)."""
+        start_time = time.perf_counter()
+        faces = await asyncio.get_running_loop().run_in_executor(
+            self._detect_executor, self.detector.detect_faces, image
+        )
+        timings['detect_ms'] = (time.perf_counter() - start_time) * 1000
+
+        start_time = time.perf_counter()
+        embeddings = await asyncio.gather(*(self.batcher.embed(face['crop']) for face in faces))
+        for face, embedding in zip(faces, embeddings):
+            face['embedding'] = embedding
+        timings['embed_ms'] = (time.perf_counter() - start_time) * 1000
+
+        return [face for face in faces if face['embedding'] is not None]
+
+    @staticmethod
+    def _region(face: dict) -> dict:
+        return {key: int(face['region'][key]) for key in ('x', 'y', 'w', 'h')}
+
+    async def _verify(self, payload: dict) -> dict:
+        timings = {}
+        faces = await self._embed_faces(self._decode_image(payload), timings)
+        if not faces:
+            return {'faces': [], 'timings': timings}
+
+        start_time = time.perf_counter()
+        results = await self._in_db(self._identify, faces)
+        timings['match_ms'] = (time.perf_counter() - start_time) * 1000
+
+        return {'faces': results, 'timings': timings}
+
+    def _identify(self, faces: list[dict]) -> list[dict]:
+        """1:N match of embedded faces against the gallery. Runs on the DB thread."""
+        gallery = self.data_manager.get_gallery()
+        queries = np.array([face['embedding'] for face in faces])
+        results = []
+        for face, found in zip(faces, self.recognizer.find_matches(
+            queries, gallery, k=1, templates=self.data_manager.get_templates
+        )):
+            user = self.data_manager.get_user(found[0][0]) if found else None
+            results.append({
+                'region': self._region(face),
+                'user_id': user['user_id'] if user else None,
+                'name': user['name'] if user else None,
+                'distance': float(found[0][1]) if found else None,
+            })
+
+        return results
+
+    async def _verify_claimed(self, user_id: str, payload: dict) -> dict:
+        """1:1 check; with "fallback" (default CLAIM_FALLBACK_SEARCH) a failed claim also runs 1:N."""
+        timings = {}
+        templates = await self._in_db(self.data_manager.get_user_templates, user_id)
+        if templates is None:
+            raise HTTPError(404, "User not found.")
+
+        faces = await self._embed_faces(self._decode_image(payload), timings)
+        if not faces:
+            return {'user_id': user_id, 'verified': False, 'distance': None, 'timings': timings}
+
+        # Several faces in view: the claim holds if any of them matches any template
+        start_time = time.perf_counter()
+        verified, distance = min(
+            (self.recognizer.verify_claim(face['embedding'], templates) for face in faces),
+            key=lambda result: result[1],
+        )
+        timings['match_ms'] = (time.perf_counter() - start_time) * 1000
+        result = {'user_id': user_id, 'verified': verified, 'distance': distance, 'timings': timings}
+
+        if not verified and payload.get('fallback', config.CLAIM_FALLBACK_SEARCH):
+            start_time = time.perf_counter()
+            result['faces'] = await self._in_db(self._identify, faces)
+            timings['fallback_ms'] = (time.perf_counter() - start_time) * 1000
+
+        return result
+
+    async def _enroll(self, payload: dict) -> dict:
+        user_id = str(payload.get('user_id', "")).strip()
+        name = str(payload.get('name', "")).strip()
+        if not user_id or not name:
+            raise HTTPError(400, "user_id and name are required.")
+        if await self._in_db(self.data_manager.user_exists, user_id):
+            raise HTTPError(409, "User ID already exists.")
+
+        faces = await self._embed_faces(self._decode_image(payload), {})
+        if not faces:
+            raise HTTPError(400, "No face detected in image.")
+
+        if not await self._in_db(self.data_manager.add_user, user_id, name, faces[0]['embedding']):
+            raise HTTPError(409, "User ID already exists.")
+
+        return {'enrolled': user_id}
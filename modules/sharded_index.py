@@ -0,0 +1,264 @@
+"""Sharded Index Module - Gallery search split across worker processes over shared memory."""
+
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+import config
+from .gallery_index import GalleryIndex
+
+
+def _attach(name: str, capacity: int, dim: int) -> tuple[shared_memory.SharedMemory, np.ndarray, np.ndarray]:
+    """Open a shared block laid out as a (capacity, dim) matrix followed by (capacity,) norms."""
+    shm = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray((capacity, dim), dtype=np.float64, buffer=shm.buf)
+    norms = np.ndarray((capacity,), dtype=np.float64, buffer=shm.buf, offset=capacity * dim * 8)
+
+    return shm, matrix, norms
+
+
+def _shard_worker(conn) -> None:
+    """
+    Worker process loop: answer top-k queries over a row range of the shared gallery.
+    The block is re-attached whenever the coordinator reallocates it.
+    """
+    shm = matrix = norms = None
+    attached = None
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            name, capacity, dim, start, end, queries, metric, k, block_size = task
+            try:
+                if attached != (name, capacity, dim):
+                    matrix = norms = None
+                    if shm is not None:
+                        shm.close()
+                    shm, matrix, norms = _attach(name, capacity, dim)
+                    attached = (name, capacity, dim)
+                shard = GalleryIndex.from_arrays(None, matrix[start:end], norms[start:end])
+                rows, dists = shard.search_batch(queries, metric, k, block_size)
+                rows[rows >= 0] += start
+                conn.send((rows, dists))
+            except Exception as e:
+                conn.send(e)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        matrix = norms = None
+        if shm is not None:
+            shm.close()
+
+
+class ShardedIndex(GalleryIndex):
+    """
+    GalleryIndex whose matrix lives in multiprocessing.shared_memory, searched by a pool
+    of worker processes: each scans a contiguous row range and returns its local top-k,
+    and the coordinator merges them. Ranges are recomputed from the current size on every
+    query, so shards stay balanced as users are enrolled and deleted.
+    Small galleries (under 2 * min_rows) are searched in-process.
+    Workers are spawned, not forked, so starting them is safe in a process that already
+    runs camera, UI or server threads; from_index starts them up front so the first
+    query does not pay the interpreter start-up.
+    """
+
+    def __init__(
+        self,
+        dim: int | None = None,
+        capacity: int = 64,
+        shards: int | None = config.SEARCH_SHARDS,
+        min_rows: int = config.SHARD_MIN_ROWS,
+    ):
+        self.shards = shards or os.cpu_count() or 1
+        self.min_rows = min_rows
+        self._shm: shared_memory.SharedMemory | None = None
+        self._workers: list[tuple[multiprocessing.Process, object]] = []
+        # Held by queries and by mutations, so a block is never freed or resized mid-query
+        self._query_lock = threading.RLock()
+        super().__init__(dim, capacity)
+
+    @classmethod
+    def from_index(
+        cls,
+        index: GalleryIndex,
+        shards: int | None = config.SEARCH_SHARDS,
+        min_rows: int = config.SHARD_MIN_ROWS,
+    ) -> "ShardedIndex":
+        """Copy an existing index (e.g. a memory-mapped snapshot) into shared memory."""
+        sharded = cls(shards=shards, min_rows=min_rows)
+        if index.dim is None or len(index) == 0:
+            return sharded
+
+        sharded._allocate(index.dim, len(index))
+        sharded._matrix[:len(index)] = index.matrix
+        sharded._norms[:len(index)] = index.norms
+        sharded._ids = [str(user_id) for user_id in index.ids]
+        sharded._positions = {user_id: i for i, user_id in enumerate(sharded._ids)}
+        sharded._size = len(index)
+        if sharded._use_shards():
+            sharded._start_workers(sharded._shard_count())
+
+        return sharded
+
+    def close(self) -> None:
+        """Stop the workers and free the shared block."""
+        self._stop_workers()
+        self._free_shared()
+
+    def _stop_workers(self) -> None:
+        for process, conn in self._workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process, conn in self._workers:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._workers = []
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def add(self, user_id: str, embedding: np.ndarray) -> None:
+        """Add or replace a single embedding; waits for running queries."""
+        with self._query_lock:
+            super().add(user_id, embedding)
+
+    def remove(self, user_id: str) -> bool:
+        """Remove embedding by user_id; waits for running queries. Returns True if removed."""
+        with self._query_lock:
+            return super().remove(user_id)
+
+    def nearest(self, query: np.ndarray, metric: str) -> tuple[int, float] | None:
+        """Return (row, distance) of the nearest stored embedding or None if empty."""
+        if not self._use_shards():
+            with self._query_lock:
+                return super().nearest(query, metric)
+
+        rows, dists = self.search_batch(np.asarray(query, dtype=np.float64)[None, :], metric, k=1)
+        if rows.shape[1] == 0 or rows[0, 0] < 0:
+            return None
+
+        return (int(rows[0, 0]), float(dists[0, 0]))
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        metric: str,
+        k: int = 1,
+        block_size: int = 1024,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Same contract as GalleryIndex.search_batch; shards are scanned in parallel."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        with self._query_lock:
+            if not self._use_shards():
+                return super().search_batch(queries, metric, k, block_size)
+
+            k = min(k, self._size)
+            n_shards = self._shard_count()
+            bounds = np.linspace(0, self._size, n_shards + 1).astype(int)
+            self._start_workers(n_shards)
+            try:
+                for (_, conn), start, end in zip(self._workers, bounds[:-1], bounds[1:]):
+                    conn.send((self._shm.name, self._capacity, self.dim, int(start), int(end),
+                               queries, metric, k, block_size))
+                results = [conn.recv() for _, conn in self._workers[:n_shards]]
+            except (EOFError, OSError):
+                # A worker died mid-query; restart the pool so no reply is left unread
+                self._stop_workers()
+                raise
+
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        # Merge local top-k lists: (M, k * shards) candidates -> global (M, k)
+        cand_rows = np.concatenate([rows for rows, _ in results], axis=1)
+        cand_dists = np.concatenate([dists for _, dists in results], axis=1)
+        order = np.lexsort((cand_rows, cand_dists), axis=1)[:, :k]
+        rows = np.take_along_axis(cand_rows, order, axis=1)
+        dists = np.take_along_axis(cand_dists, order, axis=1)
+        rows[~np.isfinite(dists)] = -1
+
+        return rows, dists
+
+    def _use_shards(self) -> bool:
+        return self.shards > 1 and self._size >= 2 * self.min_rows
+
+    def _shard_count(self) -> int:
+        return min(self.shards, self._size // self.min_rows)
+
+    def _start_workers(self, count: int) -> None:
+        """Replace workers that have died, then start more until there are at least count."""
+        alive = []
+        for process, conn in self._workers:
+            if process.is_alive():
+                alive.append((process, conn))
+            else:
+                conn.close()
+        self._workers = alive
+
+        context = multiprocessing.get_context("spawn")
+        while len(self._workers) < count:
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker, args=(child_conn,),
+                name=f"gallery-shard-{len(self._workers)}", daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._workers.append((process, parent_conn))
+
+    def _allocate(self, dim: int, capacity: int) -> None:
+        """Allocate empty storage for the given dimension in a new shared block."""
+        self.dim = dim
+        self._capacity = max(capacity, 1)
+        self._new_shared(self._capacity, dim)
+
+    def _grow(self) -> None:
+        """Double capacity into a new shared block, copying existing rows."""
+        with self._query_lock:
+            self._grow_shared()
+
+    def _grow_shared(self) -> None:
+        matrix, norms = self._matrix, self._norms
+        old_shm = self._shm
+        self._capacity *= 2
+        self._new_shared(self._capacity, self.dim)
+        self._matrix[:self._size] = matrix[:self._size]
+        self._norms[:self._size] = norms[:self._size]
+        del matrix, norms
+        # Workers holding the old block keep their mapping until they re-attach
+        self._release(old_shm)
+
+    def _new_shared(self, capacity: int, dim: int) -> None:
+        self._shm = shared_memory.SharedMemory(create=True, size=capacity * (dim + 1) * 8)
+        self._matrix = np.ndarray((capacity, dim), dtype=np.float64, buffer=self._shm.buf)
+        self._norms = np.ndarray((capacity,), dtype=np.float64, buffer=self._shm.buf, offset=capacity * dim * 8)
+
+    def _free_shared(self) -> None:
+        shm = self._shm
+        self._shm = None
+        self._matrix = self._norms = None
+        self._release(shm)
+
+    @staticmethod
+    def _release(shm: shared_memory.SharedMemory | None) -> None:
+        if shm is None:
+            return
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still alive; the mapping goes away with it
+            pass
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
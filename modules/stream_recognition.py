@@ -0,0 +1,239 @@
+"""Stream Recognition Module - Headless recognition over video files, image sequences and cameras."""
+
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterator
+import cv2
+import numpy as np
+import config
+from .face_detection import FaceDetector
+from .face_recognition import FaceRecognizer
+from .gallery_index import GalleryIndex
+from .ivf_index import IVFIndex
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Marks the end of the stream in stage queues
+_END = object()
+
+
+def read_source(source: str | int, frame_step: int = 1) -> Iterator[dict]:
+    """
+    Yield {'frame', 'timestamp', 'source', 'image'} for every frame_step-th frame.
+    source is a directory of images (sorted by name), a camera index, or anything
+    cv2.VideoCapture opens (video file, stream URL).
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(names):
+            if index % frame_step:
+                continue
+            image = cv2.imread(os.path.join(source, name))
+            if image is not None:
+                yield {'frame': index, 'timestamp': None, 'source': name, 'image': image}
+        return
+
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    try:
+        index = 0
+        while True:
+            # grab() skips frames without decoding them
+            if index % frame_step:
+                if not cap.grab():
+                    break
+                index += 1
+                continue
+            ret, image = cap.read()
+            if not ret:
+                break
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            yield {'frame': index, 'timestamp': timestamp, 'source': None, 'image': image}
+            index += 1
+    finally:
+        cap.release()
+
+
+class StreamRecognizer:
+    """
+    decode -> detect -> embed -> match, each stage on its own thread with bounded
+    queues in between, so slow stages apply backpressure instead of buffering frames.
+    With claim = (user_id, DataManager.get_user_templates(user_id)) every face is checked
+    1:1 against that identity instead of searching the gallery; with fallback, faces
+    failing the claim are identified 1:N.
+    """
+
+    def __init__(
+        self,
+        detector: FaceDetector,
+        recognizer: FaceRecognizer,
+        gallery: GalleryIndex | IVFIndex,
+        frame_step: int = 1,
+        buffer_size: int = 8,
+        templates=None,
+        claim: tuple[str, np.ndarray] | None = None,
+        fallback: bool = config.CLAIM_FALLBACK_SEARCH,
+    ):
+        self.detector = detector
+        self.recognizer = recognizer
+        self.gallery = gallery
+        self.templates = templates
+        self.claim = claim
+        self.fallback = fallback
+        self.frame_step = frame_step
+        self.buffer_size = buffer_size
+        self._latencies: dict[str, list[float]] = {}
+        self._frames = 0
+        self._faces = 0
+        self._elapsed = 0.0
+
+    def run(self, source: str | int) -> Iterator[dict]:
+        """
+        Process source and yield one result per processed frame, in order:
+        {'frame', 'timestamp', 'source', 'faces': [{'region', 'user_id', 'distance'}]}.
+        With a claim, faces also carry 'verified'.
+        """
+        self._latencies = {'decode': [], 'detect': [], 'embed': [], 'match': []}
+        self._frames = 0
+        self._faces = 0
+        stop = threading.Event()
+        queues = [queue.Queue(self.buffer_size) for _ in range(4)]
+
+        threads = [
+            threading.Thread(target=self._decode_stage, args=(source, queues[0], stop), daemon=True),
+            threading.Thread(target=self._stage, args=("detect", self._detect, queues[0], queues[1], stop), daemon=True),
+            threading.Thread(target=self._stage, args=("embed", self._embed, queues[1], queues[2], stop), daemon=True),
+            threading.Thread(target=self._stage, args=("match", self._match, queues[2], queues[3], stop), daemon=True),
+        ]
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = queues[3].get()
+                if item is _END:
+                    break
+                self._frames += 1
+                self._faces += len(item['faces'])
+                self._elapsed = time.perf_counter() - start_time
+                yield item
+        finally:
+            # Consumer stopped early or finished: unblock and join the stages
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=2)
+            self._elapsed = time.perf_counter() - start_time
+
+    def summary(self) -> dict:
+        """Sustained FPS and per-stage latency (ms) of the last run."""
+        stages = {}
+        for name, values in self._latencies.items():
+            if values:
+                values = np.array(values)
+                stages[name] = {
+                    'mean_ms': float(values.mean()),
+                    'p50_ms': float(np.percentile(values, 50)),
+                    'p95_ms': float(np.percentile(values, 95)),
+                    'max_ms': float(values.max()),
+                }
+
+        return {
+            'frames': self._frames,
+            'faces': self._faces,
+            'elapsed_s': self._elapsed,
+            'fps': self._frames / self._elapsed if self._elapsed > 0 else 0.0,
+            'stages': stages,
+        }
+
+    def _decode_stage(self, source: str | int, outbox: queue.Queue, stop: threading.Event) -> None:
+        """Read frames from source into the first queue."""
+        frames = read_source(source, self.frame_step)
+        try:
+            while not stop.is_set():
+                start_time = time.perf_counter()
+                item = next(frames, _END)
+                if item is _END:
+                    break
+                self._latencies['decode'].append((time.perf_counter() - start_time) * 1000)
+                self._put(outbox, item, stop)
+        finally:
+            frames.close()
+            self._put(outbox, _END, stop)
+
+    def _stage(self, name: str, func, inbox: queue.Queue, outbox: queue.Queue, stop: threading.Event) -> None:
+        """Apply func to every item from inbox; errors are recorded on the item, not raised."""
+        while not stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                self._put(outbox, _END, stop)
+                return
+
+            start_time = time.perf_counter()
+            try:
+                func(item)
+            except Exception as e:
+                item.setdefault('error', f"{name}: {e}")
+                item.pop('image', None)
+                item['faces'] = []
+            self._latencies[name].append((time.perf_counter() - start_time) * 1000)
+            self._put(outbox, item, stop)
+
+    @staticmethod
+    def _put(outbox: queue.Queue, item, stop: threading.Event) -> None:
+        """Blocking put that gives up once the run is stopped."""
+        while not stop.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _detect(self, item: dict) -> None:
+        item['faces'] = self.detector.detect_faces(item.pop('image'))
+
+    def _embed(self, item: dict) -> None:
+        crops = [face['crop'] for face in item['faces']]
+        for face, embedding in zip(item['faces'], self.recognizer.extract_embeddings(crops, skip_detection=True)):
+            face['embedding'] = embedding
+
+    def _match(self, item: dict) -> None:
+        """Match embedded faces together and reduce faces to JSON-friendly records."""
+        embedded = [face for face in item['faces'] if face.get('embedding') is not None]
+        matches = {}
+        if embedded and self.claim is not None:
+            claimed_id, claimed_templates = self.claim
+            rejected = []
+            for face in embedded:
+                face['verified'], distance = self.recognizer.verify_claim(face['embedding'], claimed_templates)
+                if face['verified']:
+                    matches[id(face)] = (claimed_id, distance)
+                else:
+                    rejected.append(face)
+            embedded = rejected if self.fallback else []
+
+        if embedded and len(self.gallery):
+            queries = np.array([face['embedding'] for face in embedded])
+            for face, found in zip(embedded, self.recognizer.find_matches(
+                queries, self.gallery, k=1, templates=self.templates
+            )):
+                matches[id(face)] = found[0] if found else None
+
+        records = []
+        for face in item['faces']:
+            match = matches.get(id(face))
+            record = {
+                'region': {key: int(value) for key, value in face['region'].items() if key in ('x', 'y', 'w', 'h')},
+                'user_id': match[0] if match else None,
+                'distance': float(match[1]) if match else None,
+            }
+            if self.claim is not None:
+                record['verified'] = bool(face.get('verified', False))
+            records.append(record)
+        item['faces'] = records
@@ -4,6 +4,7 @@ import numpy as np
 from .face_detection import FaceDetector
 from .face_recognition import FaceRecognizer
 from .data_manager import DataManager
+from .face_pipeline import FacePipeline
 
 
 class UserRegistration:
@@ -18,6 +19,7 @@ class UserRegistration:
         self.detector = detector
         self.recognizer = recognizer
         self.data_manager = data_manager
+        self.pipeline = FacePipeline(detector, recognizer)
 
     def register_user(self, user_id: str, name: str) -> tuple[bool, str]:
         """
@@ -33,13 +35,12 @@ class UserRegistration:
         if frame is None:
             return (False, "Failed to capture frame from camera.")
 
-        # Detect face
-        face_data = self.detector.detect_face(frame)
+        # Detect face and embed the detected crop
+        face_data = self.pipeline.process(frame)
         if face_data is None:
             return (False, "No face detected in frame.")
 
-        # Extract embedding
-        embedding = self.recognizer.extract_embedding(frame)
+        embedding = face_data['embedding']
         if embedding is None:
             return (False, "Failed to extract face embedding.")
 
@@ -60,13 +61,12 @@ class UserRegistration:
         if self.data_manager.user_exists(user_id):
             return (False, "User ID already exists.")
 
-        # Detect face
-        face_data = self.detector.detect_face(image)
+        # Detect face and embed the detected crop
+        face_data = self.pipeline.process(image)
         if face_data is None:
             return (False, "No face detected in image.")
 
-        # Extract embedding
-        embedding = self.recognizer.extract_embedding(image)
+        embedding = face_data['embedding']
         if embedding is None:
             return (False, "Failed to extract face embedding.")
 
@@ -74,4 +74,26 @@ class UserRegistration:
         if self.data_manager.add_user(user_id, name, embedding):
             return (True, f"User '{name}' registered successfully.")
         
-        return (False, "Failed to save user to database.")
\ No newline at end of file
+        return (False, "Failed to save user to database.")
+
+    def add_template_from_image(self, user_id: str, image: np.ndarray) -> tuple[bool, str]:
+        """
+        Add another face template for an existing user from provided image.
+        Returns (success: bool, message: str).
+        """
+        if not self.data_manager.user_exists(user_id):
+            return (False, "User ID does not exist.")
+
+        # Detect face and embed the detected crop
+        face_data = self.pipeline.process(image)
+        if face_data is None:
+            return (False, "No face detected in image.")
+
+        embedding = face_data['embedding']
+        if embedding is None:
+            return (False, "Failed to extract face embedding.")
+
+        if self.data_manager.add_template(user_id, embedding):
+            return (True, f"Face template added for '{user_id}'.")
+
+        return (False, "Failed to save template to database.")
@@ -0,0 +1,64 @@
+"""Face ID Recognition System - Headless recognition over video files, image directories or cameras."""
+
+import argparse
+import json
+import sys
+
+import config
+from modules import (
+    FaceDetector, AdaptiveDetector, FaceRecognizer, DataManager, GalleryIndex, StreamRecognizer,
+)
+from modules.metrics import metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize faces in a video, image directory or camera stream.")
+    parser.add_argument("source", help="Video file, directory of frames, camera index or stream URL")
+    parser.add_argument("--output", help="JSONL results file (default: stdout)")
+    parser.add_argument("--frame-step", type=int, default=1, help="Process every N-th frame")
+    parser.add_argument("--buffer-size", type=int, default=8, help="Max frames queued between stages")
+    parser.add_argument("--claim", metavar="USER_ID", help="Check every face 1:1 against this user instead of searching")
+    parser.add_argument("--fallback", action="store_true", default=config.CLAIM_FALLBACK_SEARCH,
+                        help="With --claim, identify faces that fail the claim 1:N")
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    data_manager.connect()
+    try:
+        claim = None
+        if args.claim:
+            templates = data_manager.get_user_templates(args.claim)
+            if templates is None:
+                parser.error(f"unknown user '{args.claim}'")
+            claim = (args.claim, templates)
+        # A claim without fallback never searches, so the gallery isn't loaded
+        gallery = data_manager.get_gallery() if claim is None or args.fallback else GalleryIndex()
+        detector = AdaptiveDetector() if config.DETECTION_ADAPTIVE else FaceDetector()
+        stream = StreamRecognizer(
+            detector, FaceRecognizer(), gallery,
+            frame_step=args.frame_step, buffer_size=args.buffer_size,
+            templates=data_manager.get_templates, claim=claim, fallback=args.fallback,
+        )
+
+        output = open(args.output, "w") if args.output else sys.stdout
+        try:
+            for result in stream.run(args.source):
+                output.write(json.dumps(result) + "\n")
+        finally:
+            if args.output:
+                output.close()
+    finally:
+        data_manager.close()
+
+    summary = stream.summary()
+    print(f"Frames: {summary['frames']}, faces: {summary['faces']}, "
+          f"elapsed: {summary['elapsed_s']:.2f} s, sustained FPS: {summary['fps']:.2f}", file=sys.stderr)
+    for name, stage in summary['stages'].items():
+        print(f"  {name:<7} mean {stage['mean_ms']:.1f} ms, p50 {stage['p50_ms']:.1f} ms, "
+              f"p95 {stage['p95_ms']:.1f} ms, max {stage['max_ms']:.1f} ms", file=sys.stderr)
+    if metrics.enabled:
+        print(metrics.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Face ID Recognition System - Local HTTP recognition service."""
+
+import argparse
+import asyncio
+import logging
+
+import config
+from modules import RecognitionService
+from modules.metrics import metrics
+
+
+async def serve(host: str, port: int) -> None:
+    service = RecognitionService()
+    await service.start(host, port)
+    print(f"Recognition service listening on http://{host}:{port}")
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve face verification, enrollment and deletion over HTTP.")
+    parser.add_argument("--host", default=config.SERVICE_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT, help="Port to bind")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    metrics.start_log_summary()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Module to compare full-resolution detection with adaptive (downscaled / ROI) detection on recorded clips.
+Usage: python tests/adaptive_detection_experiment.py clip1.mp4 [clip2.mp4 ...]
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+import config
+from modules.face_detection import FaceDetector
+from modules.adaptive_detector import AdaptiveDetector
+from modules.face_tracker import _iou
+from tracking_experiment import read_frames
+
+
+def run_experiment():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    detector = FaceDetector()
+
+    print("=== Adaptive Detection Experiment ===")
+    print(f"target_fps={config.DETECTION_TARGET_FPS}, min_scale={config.DETECTION_MIN_SCALE}, "
+          f"full_every={config.DETECTION_FULL_EVERY}\n")
+
+    for path in sys.argv[1:]:
+        frames = read_frames(path)
+        if not frames:
+            print(f"{path}: no frames decoded, skipped\n")
+            continue
+        # Warm up model loading so it is not counted
+        detector.detect_face(frames[0])
+
+        # Baseline: full-resolution detection on every frame
+        start_time = time.perf_counter()
+        baseline = [detector.detect_face(frame) for frame in frames]
+        baseline_s = time.perf_counter() - start_time
+
+        adaptive = AdaptiveDetector()
+        adaptive.detect_face(frames[0])
+        adaptive.reset()
+        start_time = time.perf_counter()
+        results = [adaptive.detect_face(frame) for frame in frames]
+        adaptive_s = time.perf_counter() - start_time
+
+        # Box agreement on frames where both found a face
+        ious = [_iou(a['region'], b['region']) for a, b in zip(baseline, results) if a and b]
+        n = len(frames)
+        height, width = frames[0].shape[:2]
+        print(f"--- {os.path.basename(path)} ({n} frames, {width}x{height}) ---")
+        print(f"Full resolution: {n / baseline_s:.1f} FPS, face found in {sum(r is not None for r in baseline)} frames")
+        print(f"Adaptive:        {n / adaptive_s:.1f} FPS, face found in {sum(r is not None for r in results)} frames, "
+              f"final scale {adaptive.scale:.2f}, {adaptive.roi_passes} ROI / {adaptive.full_passes} full passes")
+        if ious:
+            print(f"Box IoU vs full resolution: mean {np.mean(ious):.3f}, min {np.min(ious):.3f}")
+        print(f">>> Detection speedup: {baseline_s / adaptive_s:.2f}x\n")
+
+
+if __name__ == "__main__":
+    run_experiment()
@@ -0,0 +1,86 @@
+"""
+Module to compare approximate (IVF) search against exact search: recall@1 vs latency.
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+import config
+from modules.gallery_index import GalleryIndex
+from modules.ivf_index import IVFIndex
+
+
+def make_gallery(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered embeddings, closer to real face galleries than uniform noise."""
+    n_clusters = max(1, n // 500)
+    centers = rng.normal(size=(n_clusters, dim))
+    labels = rng.integers(0, n_clusters, n)
+    return centers[labels] + 0.5 * rng.normal(size=(n, dim))
+
+
+def run_experiment():
+    metric = config.DISTANCE_METRIC
+    n_values = [10_000, 100_000]
+    nprobe_values = [1, 2, 4, 8, 16, 32]
+    embedding_dim = 128
+    n_queries = 200
+    rng = np.random.default_rng(0)
+
+    print(f"=== IVF Recall@1 vs Latency Experiment ({metric}) ===\n")
+    plt.figure(figsize=(8, 5))
+
+    for n in n_values:
+        gallery = make_gallery(n, embedding_dim, rng)
+        ids = [f"user_{i}" for i in range(n)]
+        stored = list(zip(ids, gallery))
+
+        # Queries are noisy re-captures of enrolled users
+        targets = rng.integers(0, n, n_queries)
+        queries = gallery[targets] + 0.3 * rng.normal(size=(n_queries, embedding_dim))
+
+        exact = GalleryIndex.from_embeddings(stored)
+        start_time = time.perf_counter()
+        truth = [exact.search(q, metric)[0] for q in queries]
+        exact_ms = (time.perf_counter() - start_time) * 1000 / n_queries
+
+        start_time = time.perf_counter()
+        ivf = IVFIndex.build(stored, metric, config.IVF_NLIST)
+        build_s = time.perf_counter() - start_time
+
+        print(f"--- N = {n} (nlist={len(ivf.centroids)}, build {build_s:.2f} s) ---")
+        print(f"exact      : recall@1 1.0000, {exact_ms:.4f} ms/query")
+
+        recalls, latencies = [], []
+        for nprobe in nprobe_values:
+            ivf.nprobe = nprobe
+            start_time = time.perf_counter()
+            found = [ivf.search(q, metric)[0] for q in queries]
+            ivf_ms = (time.perf_counter() - start_time) * 1000 / n_queries
+
+            recall = np.mean([a == b for a, b in zip(found, truth)])
+            recalls.append(recall)
+            latencies.append(ivf_ms)
+            print(f"nprobe={nprobe:<4}: recall@1 {recall:.4f}, {ivf_ms:.4f} ms/query "
+                  f"({exact_ms / ivf_ms:.1f}x vs exact)")
+        print()
+
+        plt.plot(latencies, recalls, marker='o', label=f"IVF, N={n}")
+        plt.axvline(exact_ms, linestyle='--', alpha=0.5, label=f"exact, N={n}")
+
+    plt.title('IVF Recall@1 vs Query Latency')
+    plt.xlabel('Average Query Latency (ms)')
+    plt.ylabel('Recall@1')
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.7)
+
+    plt.savefig('graphs/ann_recall_latency.png')
+    print("Experiment completed successfully! Graph saved as 'graphs/ann_recall_latency.png'.")
+
+
+if __name__ == "__main__":
+    run_experiment()
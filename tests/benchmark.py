@@ -0,0 +1,334 @@
+"""
+Benchmark suite: matching, database load, insert throughput and end-to-end detect/embed
+(with a stubbed model). Writes JSON results and optionally compares them with a baseline.
+Usage:
+    python tests/benchmark.py [--quick] [--suites match db insert e2e] [--output results.json]
+                              [--baseline baseline.json] [--save-baseline] [--tolerance 0.25] [--plot]
+Exits with status 1 if any result is slower than the baseline by more than the tolerance.
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import cv2
+import numpy as np
+import config
+from modules import face_detection, face_recognition
+from modules.data_manager import DataManager, EMBEDDING_DTYPES
+from modules.face_detection import FaceDetector
+from modules.face_pipeline import FacePipeline
+from modules.face_recognition import FaceRecognizer
+from modules.gallery_index import GalleryIndex
+
+METRICS = ["cosine", "euclidean", "euclidean_l2"]
+DEFAULT_OUTPUT = os.path.join(config.BASE_DIR, "graphs", "benchmark_results.json")
+DEFAULT_BASELINE = os.path.join(config.BASE_DIR, "graphs", "benchmark_baseline.json")
+
+
+def measure(func, repeat: int, warmup: int = 1) -> dict:
+    """Call func repeat times. Returns median/p95/min latency in ms."""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start_time) * 1000)
+    times = np.array(times)
+
+    return {
+        'median_ms': float(np.median(times)),
+        'p95_ms': float(np.percentile(times, 95)),
+        'min_ms': float(times.min()),
+    }
+
+
+class StubDeepFace:
+    """
+    Stands in for DeepFace so detect/embed overhead can be measured without model cost
+    or weights: extract_faces returns faces_per_frame fixed crops and represent is a fixed
+    random projection of the resized crop.
+    """
+
+    def __init__(self, dim: int = 128, faces_per_frame: int = 1, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.projection = rng.normal(size=(32 * 32 * 3, dim))
+        self.faces_per_frame = faces_per_frame
+
+    def extract_faces(self, img_path, **kwargs) -> list[dict]:
+        frame = img_path
+        h, w = frame.shape[:2]
+        faces = []
+        for i in range(self.faces_per_frame):
+            x = (i * w) // self.faces_per_frame
+            size = min(w // self.faces_per_frame, h)
+            crop = cv2.resize(frame[:size, x:x + size], (160, 160))
+            faces.append({
+                'face': crop[:, :, ::-1].astype(np.float32) / 255,
+                'facial_area': {'x': x, 'y': 0, 'w': size, 'h': size},
+                'confidence': 0.99,
+            })
+        return faces
+
+    def represent(self, img_path, **kwargs) -> list:
+        if isinstance(img_path, list):
+            return [self.represent(img) for img in img_path]
+        small = cv2.resize(img_path, (32, 32)).astype(np.float64).ravel() / 255
+        return [{'embedding': (small @ self.projection).tolist()}]
+
+
+def bench_match(quick: bool, max_bytes: float) -> dict:
+    """
+    find_match (one query) and find_matches (batch of 32) per metric, dimension,
+    compute dtype and gallery size. Storage-only dtypes (float16, int8) are decoded
+    to float64 for search, so they are covered by the db suite instead.
+    """
+    sizes = [1_000, 10_000] if quick else [1_000, 10_000, 100_000, 1_000_000]
+    dims = [128] if quick else [128, 512]
+    dtypes = ["float64", "float32"]
+    repeat = 5 if quick else 20
+    rng = np.random.default_rng(0)
+    results = {}
+
+    for dim in dims:
+        for n in sizes:
+            for dtype in dtypes:
+                if n * dim * np.dtype(dtype).itemsize > max_bytes:
+                    print(f"  skip match d={dim} n={n} {dtype} (over --max-bytes)")
+                    continue
+                matrix = rng.normal(size=(n, dim)).astype(dtype)
+                index = GalleryIndex.from_arrays(
+                    [f"user_{i}" for i in range(n)], matrix, np.linalg.norm(matrix, axis=1)
+                )
+                queries = rng.normal(size=(32, dim)).astype(dtype)
+                for metric in METRICS:
+                    recognizer = FaceRecognizer(distance_metric=metric)
+                    key = f"match/{metric}/d{dim}/{dtype}/n{n}"
+                    results[f"{key}/single"] = measure(lambda: recognizer.find_match(queries[0], index), repeat)
+                    results[f"{key}/batch32"] = measure(lambda: recognizer.find_matches(queries, index), repeat)
+                    print(f"  {key}: single {results[f'{key}/single']['median_ms']:.3f} ms, "
+                          f"batch32 {results[f'{key}/batch32']['median_ms']:.3f} ms")
+                del matrix, index
+
+    return results
+
+
+def bench_db(quick: bool) -> dict:
+    """Cold gallery load, get_all_embeddings, get_user and list_users per storage dtype."""
+    n = 2_000 if quick else 20_000
+    dim = 128
+    repeat = 3 if quick else 5
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(n, dim))
+    user_ids = [f"user_{i}" for i in range(n)]
+    results = {}
+
+    for dtype in EMBEDDING_DTYPES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_manager = DataManager(
+                os.path.join(tmp_dir, "bench.db"), search_mode="exact",
+                embedding_dtype=dtype, snapshot_path=None,
+            )
+            data_manager.connect()
+            data_manager.add_users(list(zip(user_ids, ["name"] * n, embeddings)))
+
+            def cold_gallery():
+                data_manager.gallery = None
+                data_manager.get_gallery()
+
+            lookups = [user_ids[i] for i in rng.integers(0, n, 1000)]
+            key = f"db/{dtype}/n{n}"
+            results[f"{key}/get_all_embeddings"] = measure(data_manager.get_all_embeddings, repeat)
+            results[f"{key}/gallery_load"] = measure(cold_gallery, repeat)
+            results[f"{key}/get_user_x1000"] = measure(lambda: [data_manager.get_user(u) for u in lookups], repeat)
+            results[f"{key}/list_users_page"] = measure(lambda: data_manager.list_users(100, after="user_5"), repeat)
+            data_manager.close()
+
+        print(f"  {key}: gallery load {results[f'{key}/gallery_load']['median_ms']:.1f} ms, "
+              f"1000 get_user {results[f'{key}/get_user_x1000']['median_ms']:.1f} ms")
+
+    return results
+
+
+def bench_insert(quick: bool) -> dict:
+    """add_user one at a time vs. add_users in chunks (ms per 1000 rows)."""
+    n_single = 200 if quick else 1_000
+    n_batch = 2_000 if quick else 20_000
+    dim = 128
+    rng = np.random.default_rng(0)
+    results = {}
+
+    def run(batched: bool, n: int) -> float:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_manager = DataManager(os.path.join(tmp_dir, "bench.db"), snapshot_path=None)
+            data_manager.connect()
+            users = [(f"user_{i}", "name", rng.normal(size=dim)) for i in range(n)]
+            start_time = time.perf_counter()
+            if batched:
+                data_manager.add_users(users)
+            else:
+                for user in users:
+                    data_manager.add_user(*user)
+            elapsed = (time.perf_counter() - start_time) * 1000
+            data_manager.close()
+        return elapsed * 1000 / n
+
+    for name, batched, n in [("add_user", False, n_single), ("add_users", True, n_batch)]:
+        per_1000 = [run(batched, n) for _ in range(3)]
+        results[f"insert/{config.EMBEDDING_DTYPE}/{name}_per_1000"] = {
+            'median_ms': float(np.median(per_1000)),
+            'p95_ms': float(np.max(per_1000)),
+            'min_ms': float(np.min(per_1000)),
+        }
+        print(f"  {name}: {np.median(per_1000):.1f} ms per 1000 rows ({1e6 / np.median(per_1000):.0f} rows/s)")
+
+    return results
+
+
+def bench_e2e(quick: bool) -> dict:
+    """detect -> embed -> match through FacePipeline with the stubbed model."""
+    repeat = 10 if quick else 50
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8)
+    results = {}
+
+    original = (face_detection.DeepFace, face_recognition.DeepFace)
+    try:
+        for faces_per_frame in [1, 4]:
+            stub = StubDeepFace(faces_per_frame=faces_per_frame)
+            face_detection.DeepFace = face_recognition.DeepFace = stub
+            recognizer = FaceRecognizer()
+            recognizer.cache = None  # measure the pipeline, not cache hits
+            pipeline = FacePipeline(FaceDetector(), recognizer)
+            gallery = GalleryIndex.from_embeddings(
+                [(f"user_{i}", rng.normal(size=128)) for i in range(10_000)]
+            )
+
+            def verify():
+                faces = pipeline.process_all(frame)
+                pipeline.identify_all(faces, gallery)
+
+            key = f"e2e/faces{faces_per_frame}"
+            results[f"{key}/process"] = measure(lambda: pipeline.process(frame), repeat)
+            results[f"{key}/verify"] = measure(verify, repeat)
+            print(f"  {key}: process {results[f'{key}/process']['median_ms']:.2f} ms, "
+                  f"verify {results[f'{key}/verify']['median_ms']:.2f} ms")
+    finally:
+        face_detection.DeepFace, face_recognition.DeepFace = original
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Keys whose median latency regressed by more than tolerance (fraction) vs. baseline."""
+    regressions = []
+    print(f"\n{'benchmark':<55} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, current in sorted(results.items()):
+        if key not in baseline:
+            continue
+        before = baseline[key]['median_ms']
+        after = current['median_ms']
+        change = after / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<55} {before:>10.3f} {after:>10.3f} {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def plot_match(results: dict, path: str) -> None:
+    """Single-query match latency vs. gallery size, one line per metric (d=128, float64)."""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 5))
+    for metric in METRICS:
+        points = sorted(
+            (int(key.split("/")[4][1:]), value['median_ms'])
+            for key, value in results.items()
+            if key.startswith(f"match/{metric}/d128/float64/") and key.endswith("/single")
+        )
+        if points:
+            plt.plot(*zip(*points), marker='o', linewidth=2, label=metric)
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.title('Face Matching Latency vs. Gallery Size')
+    plt.xlabel('Number of Stored Users (N)')
+    plt.ylabel('Median Execution Time (ms)')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend()
+    plt.savefig(path)
+    print(f"Graph saved as '{path}'.")
+
+
+def run_benchmarks():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--suites", nargs="+", default=["match", "db", "insert", "e2e"],
+                        choices=["match", "db", "insert", "e2e"])
+    parser.add_argument("--quick", action="store_true", help="Small sizes, for a fast check")
+    parser.add_argument("--max-bytes", type=float, default=2e9, help="Skip galleries larger than this")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--plot", action="store_true", help="Save the match latency graph to graphs/")
+    args = parser.parse_args()
+
+    suites = {'match': lambda: bench_match(args.quick, args.max_bytes), 'db': lambda: bench_db(args.quick),
+              'insert': lambda: bench_insert(args.quick), 'e2e': lambda: bench_e2e(args.quick)}
+
+    print("=== Benchmark Suite ===")
+    results = {}
+    for name in args.suites:
+        print(f"\n--- {name} ---")
+        results.update(suites[name]())
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to '{args.output}'.")
+
+    if args.plot:
+        plot_match(results, os.path.join(config.BASE_DIR, "graphs", "experimental_result_graph.png"))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved as '{args.baseline}'.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (use --save-baseline).")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}.")
+        return 1
+    print("\nNo regressions.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmarks())
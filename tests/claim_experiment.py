@@ -0,0 +1,65 @@
+"""
+Module to compare claimed-identity (1:1) verification against 1:N identification as the gallery grows.
+Usage: python tests/claim_experiment.py [embedding_dim]
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import time
+import numpy as np
+from modules.data_manager import DataManager
+from modules.face_recognition import FaceRecognizer
+
+GALLERY_SIZES = [1_000, 10_000, 100_000]
+QUERIES = 200
+
+
+def run_experiment():
+    embedding_dim = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    recognizer = FaceRecognizer()
+    rng = np.random.default_rng(0)
+
+    print("=== Claimed-Identity Verification Experiment ===\n")
+    print(f"{'users':>8} {'1:1 ms':>8} {'1:N ms':>8} {'speedup':>8} {'agree':>6}")
+
+    for n_users in GALLERY_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_manager = DataManager(os.path.join(tmp, "claim.db"), snapshot_path=None)
+            data_manager.connect()
+            embeddings = rng.normal(size=(n_users, embedding_dim))
+            data_manager.add_users([(f"user_{i}", "name", embeddings[i]) for i in range(n_users)])
+            data_manager.get_gallery()  # resident gallery is loaded once in the app
+
+            claimed = rng.integers(n_users, size=QUERIES)
+            probes = embeddings[claimed] + rng.normal(scale=0.1, size=(QUERIES, embedding_dim))
+
+            start_time = time.perf_counter()
+            claims = [
+                recognizer.verify_claim(probe, data_manager.get_user_templates(f"user_{i}"))[0]
+                for probe, i in zip(probes, claimed)
+            ]
+            claim_ms = (time.perf_counter() - start_time) * 1000 / QUERIES
+
+            start_time = time.perf_counter()
+            identified = [
+                recognizer.find_match(probe, data_manager.get_gallery(), templates=data_manager.get_templates)
+                for probe in probes
+            ]
+            search_ms = (time.perf_counter() - start_time) * 1000 / QUERIES
+
+            # 1:1 accepts exactly when 1:N returns the claimed user
+            agree = np.mean([
+                verified == (found is not None and found[0] == f"user_{i}")
+                for verified, found, i in zip(claims, identified, claimed)
+            ])
+            data_manager.close()
+
+        print(f"{n_users:>8} {claim_ms:>8.3f} {search_ms:>8.3f} {search_ms / claim_ms:>7.1f}x {agree:>6.1%}")
+
+
+if __name__ == "__main__":
+    run_experiment()
@@ -0,0 +1,86 @@
+"""
+Module to measure DataManager throughput under parallel verify (read) and enroll (write) load,
+comparing rollback-journal mode against WAL.
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import threading
+import time
+import numpy as np
+import config
+from modules.data_manager import DataManager
+
+
+def run_load(db_path: str, readers: int, writers: int, duration: float, embedding_dim: int) -> tuple[int, int]:
+    """Run reader and writer threads against one shared DataManager. Returns (reads, writes)."""
+    data_manager = DataManager(db_path, snapshot_path=None)
+    data_manager.connect()
+    user_ids = [f"user_{i}" for i in range(1000)]
+    rng = np.random.default_rng(0)
+    data_manager.add_users([(user_id, "name", rng.normal(size=embedding_dim)) for user_id in user_ids])
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0}
+    lock = threading.Lock()
+
+    def reader(seed: int):
+        # Verify: sync the resident gallery, then fetch the matched user by primary key
+        local_rng = np.random.default_rng(seed)
+        n = 0
+        while not stop.is_set():
+            data_manager.get_gallery()
+            data_manager.get_user(user_ids[local_rng.integers(len(user_ids))])
+            n += 1
+        with lock:
+            counts['reads'] += n
+
+    def writer(seed: int):
+        local_rng = np.random.default_rng(seed)
+        n = 0
+        while not stop.is_set():
+            data_manager.add_user(f"new_{seed}_{n}", "name", local_rng.normal(size=embedding_dim))
+            n += 1
+        with lock:
+            counts['writes'] += n
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    data_manager.close()
+
+    return counts['reads'], counts['writes']
+
+
+def run_experiment():
+    journal_modes = ["DELETE", "WAL"]
+    loads = [(4, 0), (0, 1), (4, 1), (8, 2)]
+    duration = 3.0
+    embedding_dim = 128
+
+    print("=== SQLite Concurrency Experiment ===\n")
+    print(f"synchronous={config.SQLITE_SYNCHRONOUS}, duration={duration} s per run\n")
+    print(f"{'journal':<8} {'readers':>8} {'writers':>8} {'reads/s':>10} {'writes/s':>10}")
+
+    for journal_mode in journal_modes:
+        config.SQLITE_JOURNAL_MODE = journal_mode
+        for readers, writers in loads:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                reads, writes = run_load(
+                    os.path.join(tmp_dir, "bench.db"), readers, writers, duration, embedding_dim
+                )
+            print(f"{journal_mode:<8} {readers:>8} {writers:>8} {reads / duration:>10.0f} {writes / duration:>10.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    run_experiment()
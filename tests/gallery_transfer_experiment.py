@@ -0,0 +1,68 @@
+"""
+Module to measure gallery export/import throughput and peak memory as the gallery grows.
+Peak memory should stay flat: both directions hold one chunk at a time.
+Usage: python tests/gallery_transfer_experiment.py [embedding_dim]
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from modules.data_manager import DataManager
+
+GALLERY_SIZES = [10_000, 50_000, 200_000]
+
+
+def measure(func) -> tuple[float, float]:
+    """Run func, return (seconds, peak traced MB)."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak / 1e6
+
+
+def run_experiment():
+    embedding_dim = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    rng = np.random.default_rng(0)
+
+    print("=== Gallery Transfer Experiment ===\n")
+    print(f"{'users':>8} {'db MB':>7} {'file MB':>8} {'export s':>9} {'peak MB':>8} {'import s':>9} {'peak MB':>8}")
+
+    for n_users in GALLERY_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = DataManager(os.path.join(tmp, "source.db"), snapshot_path=None)
+            source.connect()
+            for start in range(0, n_users, 10_000):
+                count = min(10_000, n_users - start)
+                source.add_users([
+                    (f"user_{start + i}", f"Name {start + i}", embedding)
+                    for i, embedding in enumerate(rng.normal(size=(count, embedding_dim)))
+                ])
+
+            archive_path = os.path.join(tmp, "gallery.npz")
+            export_s, export_mb = measure(lambda: source.export_gallery(archive_path))
+            source.close()
+
+            target = DataManager(os.path.join(tmp, "target.db"), snapshot_path=None)
+            target.connect()
+            import_s, import_mb = measure(lambda: target.import_gallery(archive_path))
+            target.close()
+
+            db_mb = os.path.getsize(os.path.join(tmp, "source.db")) / 1e6
+            file_mb = os.path.getsize(archive_path) / 1e6
+
+        print(f"{n_users:>8} {db_mb:>7.1f} {file_mb:>8.1f} {export_s:>9.2f} {export_mb:>8.1f} "
+              f"{import_s:>9.2f} {import_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    run_experiment()
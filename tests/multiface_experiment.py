@@ -0,0 +1,81 @@
+"""
+Module to measure multi-face throughput: per-face embedding and matching vs one batched call.
+Usage: python tests/multiface_experiment.py face_image.jpg
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import cv2
+import numpy as np
+from modules.face_detection import FaceDetector
+from modules.face_recognition import FaceRecognizer
+from modules.face_pipeline import FacePipeline
+from modules.gallery_index import GalleryIndex
+
+
+def run_experiment():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    face_img = cv2.imread(sys.argv[1])
+    if face_img is None:
+        print("Failed to load image.")
+        return
+
+    detector = FaceDetector()
+    recognizer = FaceRecognizer()
+    pipeline = FacePipeline(detector, recognizer)
+    face_counts = [1, 2, 4, 8]
+    trials = 5
+
+    # Gallery of random users with the model's embedding dimension
+    probe = pipeline.process(face_img)
+    if probe is None or probe['embedding'] is None:
+        print("No face detected in the test image.")
+        return
+    rng = np.random.default_rng(0)
+    gallery = GalleryIndex.from_embeddings(
+        [(f"user_{i}", rng.normal(size=probe['embedding'].shape[0])) for i in range(1000)]
+    )
+
+    print("=== Multi-Face Throughput Experiment ===\n")
+
+    for n in face_counts:
+        # Tile the face n times so the detector finds n faces
+        cols = min(n, 4)
+        rows = (n + cols - 1) // cols
+        frame = np.zeros((rows * face_img.shape[0], cols * face_img.shape[1], 3), dtype=np.uint8)
+        for i in range(n):
+            r, c = divmod(i, cols)
+            frame[r * face_img.shape[0]:(r + 1) * face_img.shape[0],
+                  c * face_img.shape[1]:(c + 1) * face_img.shape[1]] = face_img
+        faces = detector.detect_faces(frame)
+
+        # Per face: one embedding call and one search per face
+        start_time = time.perf_counter()
+        for _ in range(trials):
+            for face in faces:
+                embedding = recognizer.extract_embedding(face['crop'], skip_detection=True)
+                recognizer.find_match(embedding, gallery)
+        sequential_ms = (time.perf_counter() - start_time) * 1000 / trials
+
+        # Batched: one embedding call and one matrix search for all faces
+        start_time = time.perf_counter()
+        for _ in range(trials):
+            embeddings = recognizer.extract_embeddings([face['crop'] for face in faces], skip_detection=True)
+            recognizer.find_matches(np.array(embeddings), gallery, k=1)
+        batched_ms = (time.perf_counter() - start_time) * 1000 / trials
+
+        found = max(len(faces), 1)
+        print(f"--- {n} faces in frame ({len(faces)} detected) ---")
+        print(f"Per-face:  {sequential_ms:.2f} ms/frame, {sequential_ms / found:.2f} ms/face")
+        print(f"Batched:   {batched_ms:.2f} ms/frame, {batched_ms / found:.2f} ms/face\n")
+
+
+if __name__ == "__main__":
+    run_experiment()
@@ -0,0 +1,69 @@
+"""
+Module to measure per-capture latency saved by the single-pass detect-then-embed pipeline.
+Usage: python tests/pipeline_experiment.py [image_path]  (default: one camera frame)
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import cv2
+from modules.face_detection import FaceDetector
+from modules.face_recognition import FaceRecognizer
+from modules.face_pipeline import FacePipeline
+
+
+def time_ms(func, trials: int) -> float:
+    """Average wall time of func() in milliseconds."""
+    start_time = time.perf_counter()
+    for _ in range(trials):
+        func()
+    return (time.perf_counter() - start_time) * 1000 / trials
+
+
+def run_experiment():
+    detector = FaceDetector()
+    recognizer = FaceRecognizer()
+    pipeline = FacePipeline(detector, recognizer)
+    trials = 20
+
+    if len(sys.argv) > 1:
+        frame = cv2.imread(sys.argv[1])
+    else:
+        detector.start_camera()
+        frame = detector.get_frame()
+        detector.stop_camera()
+    if frame is None:
+        print("Failed to load image / camera frame.")
+        return
+    if detector.detect_face(frame) is None:
+        print("No face detected in the test image.")
+        return
+
+    def two_pass():
+        # Previous path: detect, then let DeepFace.represent detect again on the full frame
+        detector.detect_face(frame)
+        recognizer.extract_embedding(frame)
+
+    def single_pass():
+        pipeline.process(frame)
+
+    print("=== Detect-then-Embed Pipeline Experiment ===\n")
+    # Warm up model loading so it is not counted
+    two_pass()
+    single_pass()
+
+    two_pass_ms = time_ms(two_pass, trials)
+    single_pass_ms = time_ms(single_pass, trials)
+
+    print(f"Frame size: {frame.shape[1]}x{frame.shape[0]}, trials: {trials}")
+    print(f"Two-pass (detect + represent on frame): {two_pass_ms:.2f} ms")
+    print(f"Single-pass (detect + represent on crop): {single_pass_ms:.2f} ms")
+    print(f">>> Saved per capture: {two_pass_ms - single_pass_ms:.2f} ms "
+          f"({(1 - single_pass_ms / two_pass_ms):.1%})")
+
+
+if __name__ == "__main__":
+    run_experiment()
@@ -0,0 +1,62 @@
+"""
+Module to measure the accuracy impact of compact embedding storage dtypes
+against the float64 baseline.
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import config
+from modules.data_manager import EMBEDDING_DTYPES, encode_embedding, decode_embedding
+from modules.gallery_index import GalleryIndex
+
+
+def run_experiment():
+    metrics = ["cosine", "euclidean", "euclidean_l2"]
+    n_users = 5000
+    n_queries = 200
+    embedding_dim = 128
+    rng = np.random.default_rng(0)
+
+    # Queries are noisy re-captures of enrolled users
+    gallery = rng.normal(size=(n_users, embedding_dim))
+    targets = rng.integers(0, n_users, n_queries)
+    queries = gallery[targets] + 0.5 * rng.normal(size=(n_queries, embedding_dim))
+    ids = [f"user_{i}" for i in range(n_users)]
+
+    print("=== Embedding Storage Dtype Experiment ===\n")
+    print(f"N = {n_users}, D = {embedding_dim}, queries = {n_queries}, threshold = {config.RECOGNITION_THRESHOLD}\n")
+
+    for metric in metrics:
+        baseline = GalleryIndex.from_embeddings(list(zip(ids, gallery)))
+        base_dists = np.array([baseline.distances(q, metric) for q in queries])
+        base_best = base_dists.argmin(axis=1)
+
+        print(f"--- {metric} ---")
+        print(f"{'dtype':<8} {'bytes':>6} {'mean |dd|':>12} {'max |dd|':>12} {'rank-1 agree':>13} {'accept flips':>13}")
+
+        for dtype in EMBEDDING_DTYPES:
+            blobs = [encode_embedding(emb, dtype) for emb in gallery]
+            decoded = [decode_embedding(blob, dtype) for blob in blobs]
+            index = GalleryIndex.from_embeddings(list(zip(ids, decoded)))
+            dists = np.array([index.distances(q, metric) for q in queries])
+            best = dists.argmin(axis=1)
+
+            error = np.abs(dists - base_dists)
+            agree = np.mean(best == base_best)
+            rows = np.arange(n_queries)
+            flips = np.sum(
+                (dists[rows, best] < config.RECOGNITION_THRESHOLD)
+                != (base_dists[rows, base_best] < config.RECOGNITION_THRESHOLD)
+            )
+            print(f"{dtype:<8} {len(blobs[0]):>6} {error.mean():>12.2e} {error.max():>12.2e} {agree:>13.4f} {flips:>13}")
+        print()
+
+    print("Experiment completed successfully!")
+
+
+if __name__ == "__main__":
+    run_experiment()
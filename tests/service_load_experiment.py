@@ -0,0 +1,143 @@
+"""
+Module to load-test the recognition service: concurrent /verify requests from one image,
+after checking that oversized and malformed requests are rejected with 413/431/400.
+Start the service first (python serve.py), then:
+Usage: python tests/service_load_experiment.py face_image.jpg [--concurrency 16] [--requests 500]
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+import numpy as np
+import config
+from modules.recognition_service import MAX_BODY_BYTES, MAX_HEADER_LINES
+
+
+async def post(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str, body: bytes) -> dict:
+    """Send one request on a keep-alive connection and read the JSON response."""
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode().partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(payload.get('error', status))
+
+    return payload
+
+
+async def raw_request(host: str, port: int, data: bytes) -> tuple[int, str]:
+    """Send raw bytes on a new connection; return (status, Connection header)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(data)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        if not status_line:
+            return 0, "no response"
+        connection = ""
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode().partition(":")
+            if key.strip().lower() == "connection":
+                connection = value.strip()
+        return int(status_line.split()[1]), connection
+    finally:
+        writer.close()
+
+
+async def check_bad_requests(host: str, port: int) -> None:
+    """Oversized and malformed requests must get 413/431/400 with Connection: close, not a dropped socket."""
+    cases = [
+        ("oversized body", f"POST /verify HTTP/1.1\r\nHost: {host}\r\n"
+                           f"Content-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode(), 413),
+        ("malformed request line", b"GARBAGE\r\n\r\n", 400),
+        ("non-numeric Content-Length", f"POST /verify HTTP/1.1\r\nHost: {host}\r\n"
+                                       f"Content-Length: abc\r\n\r\n".encode(), 400),
+        ("oversized request line", f"GET /{'a' * 100_000} HTTP/1.1\r\n\r\n".encode(), 431),
+        ("too many headers", f"GET /health HTTP/1.1\r\n".encode()
+                             + b"".join(f"X-Header-{i}: 1\r\n".encode() for i in range(MAX_HEADER_LINES + 1))
+                             + b"\r\n", 431),
+    ]
+    print("--- malformed requests ---")
+    for name, data, expected in cases:
+        status, connection = await raw_request(host, port, data)
+        result = "ok" if status == expected and connection == "close" else "FAILED"
+        print(f"{name}: status {status}, Connection: {connection or '-'} (expected {expected}, close) {result}")
+    print()
+
+
+async def client(host: str, port: int, body: bytes, remaining: list, latencies: list, errors: list) -> None:
+    """One connection issuing requests back to back until the shared budget is used."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start_time = time.perf_counter()
+            try:
+                await post(reader, writer, host, "/verify", body)
+                latencies.append((time.perf_counter() - start_time) * 1000)
+            except RuntimeError as e:
+                errors.append(str(e))
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, body: bytes, concurrency: int, requests: int) -> None:
+    latencies, errors = [], []
+    remaining = [requests]
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(host, port, body, remaining, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    print(f"--- concurrency {concurrency}, {requests} requests ---")
+    if latencies:
+        values = np.array(latencies)
+        print(f"Latency: p50 {np.percentile(values, 50):.1f} ms, p95 {np.percentile(values, 95):.1f} ms, "
+              f"p99 {np.percentile(values, 99):.1f} ms")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/s, errors: {len(errors)}\n")
+
+
+def run_experiment():
+    parser = argparse.ArgumentParser(description="Load-test the local recognition service.")
+    parser.add_argument("image", help="Face image sent with every request")
+    parser.add_argument("--host", default=config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        body = json.dumps({'image': base64.b64encode(f.read()).decode()}).encode()
+
+    print("=== Recognition Service Load Experiment ===")
+    print(f"max_batch={config.SERVICE_MAX_BATCH}, max_wait_ms={config.SERVICE_MAX_WAIT_MS}\n")
+
+    asyncio.run(check_bad_requests(args.host, args.port))
+    for concurrency in args.concurrency:
+        asyncio.run(run(args.host, args.port, body, concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    run_experiment()
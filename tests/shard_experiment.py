@@ -0,0 +1,67 @@
+"""
+Module to measure sharded (multi-process) exact search speedup over single-process search.
+Usage: python tests/shard_experiment.py [n_users] [embedding_dim]
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+import config
+from modules.gallery_index import GalleryIndex
+from modules.sharded_index import ShardedIndex
+
+
+def time_queries(index: GalleryIndex, queries: np.ndarray, metric: str) -> tuple[float, float]:
+    """Median ms of one single-query search and of one 32-query batch search."""
+    index.search(queries[0], metric)  # warm-up
+    single, batch = [], []
+    for query in queries[:20]:
+        start_time = time.perf_counter()
+        index.search(query, metric)
+        single.append((time.perf_counter() - start_time) * 1000)
+    for _ in range(5):
+        start_time = time.perf_counter()
+        index.search_batch(queries, metric, k=5)
+        batch.append((time.perf_counter() - start_time) * 1000)
+
+    return float(np.median(single)), float(np.median(batch))
+
+
+def run_experiment():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    embedding_dim = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    metric = config.DISTANCE_METRIC
+    cpus = os.cpu_count() or 1
+    shard_counts = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+
+    rng = np.random.default_rng(0)
+    gallery = GalleryIndex.from_embeddings(
+        [(f"user_{i}", embedding) for i, embedding in enumerate(rng.normal(size=(n_users, embedding_dim)))]
+    )
+    queries = rng.normal(size=(32, embedding_dim))
+
+    print("=== Sharded Search Experiment ===\n")
+    print(f"N = {n_users}, D = {embedding_dim}, metric = {metric}, CPUs = {cpus}\n")
+
+    base_single, base_batch = time_queries(gallery, queries, metric)
+    expected = gallery.search_batch(queries, metric, k=5)[0]
+    print(f"{'shards':<8} {'single ms':>10} {'speedup':>8} {'batch32 ms':>11} {'speedup':>8} {'same top-5':>11}")
+    print(f"{'none':<8} {base_single:>10.2f} {1:>8.2f} {base_batch:>11.2f} {1:>8.2f} {'-':>11}")
+
+    for shards in shard_counts:
+        index = ShardedIndex.from_index(gallery, shards=shards, min_rows=1)
+        try:
+            single, batch = time_queries(index, queries, metric)
+            same = np.array_equal(index.search_batch(queries, metric, k=5)[0], expected)
+        finally:
+            index.close()
+        print(f"{shards:<8} {single:>10.2f} {base_single / single:>8.2f} "
+              f"{batch:>11.2f} {base_batch / batch:>8.2f} {str(same):>11}")
+
+
+if __name__ == "__main__":
+    run_experiment()
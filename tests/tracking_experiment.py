@@ -0,0 +1,70 @@
+"""
+Module to measure how much full detection the face tracker saves on recorded clips.
+Usage: python tests/tracking_experiment.py clip1.mp4 [clip2.mp4 ...]
+"""
+
+import sys
+import os
+# Also "see" files on the main dir
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import cv2
+import config
+from modules.face_detection import FaceDetector
+from modules.face_tracker import FaceTracker
+
+
+def read_frames(path: str, max_frames: int = 600) -> list:
+    """Decode up to max_frames frames so decoding is not part of the timing."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    return frames
+
+
+def run_experiment():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    detector = FaceDetector()
+
+    print("=== Face Tracking Experiment ===")
+    print(f"detect_every={config.TRACKING_DETECT_EVERY}, min_score={config.TRACKING_MIN_SCORE}\n")
+
+    for path in sys.argv[1:]:
+        frames = read_frames(path)
+        if not frames:
+            print(f"{path}: no frames decoded, skipped\n")
+            continue
+        # Warm up model loading so it is not counted
+        detector.detect_face(frames[0])
+
+        # Baseline: full detection on every frame
+        start_time = time.perf_counter()
+        found_baseline = sum(detector.detect_face(frame) is not None for frame in frames)
+        baseline_s = time.perf_counter() - start_time
+
+        tracker = FaceTracker(detector)
+        start_time = time.perf_counter()
+        found_tracked = sum(tracker.update(frame) is not None for frame in frames)
+        tracked_s = time.perf_counter() - start_time
+
+        n = len(frames)
+        print(f"--- {os.path.basename(path)} ({n} frames) ---")
+        print(f"Detect every frame: {n} detections, {n / baseline_s:.1f} FPS, "
+              f"{n / baseline_s:.1f} detections/s, face found in {found_baseline} frames")
+        print(f"Tracking:           {tracker.detections} detections, {n / tracked_s:.1f} FPS, "
+              f"{tracker.detections / tracked_s:.1f} detections/s, face found in {found_tracked} frames")
+        print(f">>> Detections per frame reduced by {1 - tracker.detections / n:.1%}\n")
+
+
+if __name__ == "__main__":
+    run_experiment()